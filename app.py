@@ -3,58 +3,940 @@ Ruoholahden Lounas - Web-sovellus
 Hakee ja näyttää päivän lounaslistat Ruoholahdenkatu 21:n lähiravintoloista.
 """
 
-from flask import Flask, render_template, jsonify
-from scrapers import fetch_all_restaurants, FINLAND_TZ
-from datetime import datetime, date
+from flask import (Flask, Response, render_template, jsonify, request, abort, redirect, url_for, g,
+                   get_template_attribute)
+from flask.json.provider import JSONProvider
+from scrapers import (indexed_restaurants, fetch_restaurants, make_payload, parse_day, location_keys,
+                      FETCHERS, LOCATIONS, DEFAULT_LOCATION)
+from dataclasses import replace
+from datetime import date
+import gzip
+import hashlib
+import os
+import threading
+import time
+import uuid
+import cache_backend
+import diets
+import history
+import metrics
+import models
+import scrapers
+import search
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class _JSONProvider(JSONProvider):
+    """jsonify ja tojson orjsonilla (ks. models.dumps); ravintolamallit sarjallistuvat suoraan."""
+
+    def dumps(self, obj, **kwargs):
+        return models.dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return models.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(models.dumps(obj), mimetype="application/json")
+
 
 app = Flask(__name__)
+app.json = _JSONProvider(app)
 
-# Välimuisti - haetaan data max kerran per 30 min, nollautuu päivän vaihtuessa
-_cache = {"data": None, "timestamp": None, "date": None}
+# Välimuisti - haetaan data max kerran per 30 min, nollautuu päivän vaihtuessa.
+# Tausta valitaan LOUNAS_CACHE_BACKEND-muuttujalla (memory / sqlite); sqlite
+# jakaa saman tuloksen kaikille gunicorn-workereille. Jokaisella sijainnilla on
+# oma merkintänsä (oletussijainnilla CACHE_KEY, muilla CACHE_KEY:<sijainti>).
+_cache = cache_backend.from_env()
+CACHE_KEY = "restaurants"
 CACHE_TTL_SECONDS = 1800  # 30 minuuttia
 
+# Vanhentunutta dataa tarjoillaan heti ja päivitetään taustalla, kunhan se ei
+# ole yli MAX_STALE sekuntia yli vanhenemisajan. Vain yksi säie / prosessi kerrallaan
+# scrapaa; muut odottavat sen tulosta (single-flight).
+CACHE_MAX_STALE_SECONDS = 1800
+REFRESH_LOCK_NAME = "refresh:" + CACHE_KEY
+REFRESH_LOCK_TTL_SECONDS = 120
+REFRESH_WAIT_SECONDS = 60
+
+# Jokaisella ravintolalla on oma välimuistimerkintä ja TTL. Päivitys hakee vain
+# vanhentuneet tai rikki olevat ravintolat; epäonnistunut haku säilyttää viimeisimmän
+# toimivan menun ja seuraava yritys lykkääntyy eksponentiaalisesti.
+RESTAURANT_KEY_PREFIX = "restaurant:"
+RESTAURANT_TTL_SECONDS = CACHE_TTL_SECONDS
+FAILURE_BACKOFF_SECONDS = 60
+FAILURE_BACKOFF_MAX_SECONDS = 1800
+
+# Onnistuneet haut kirjataan menuhistoriaan (ks. history.py); tyhjä
+# LOUNAS_HISTORY_PATH ottaa historian pois päältä.
+_history = history.from_env()
+
+# Viimeisin onnistunut data tallennetaan levylle tilannevedokseksi. Uusi worker
+# (uudelleenkäynnistys, deploy) lataa sen ensimmäisellä välimuistin ohituksella ja
+# tarjoilee saman päivän datan heti scrapauksen odottamisen sijaan. Tyhjä
+# LOUNAS_SNAPSHOT_PATH ottaa vedoksen pois päältä.
+SNAPSHOT_PATH = os.environ.get("LOUNAS_SNAPSHOT_PATH", os.path.join(".cache", "snapshot.json"))
+_snapshot_loaded = False
+_snapshot_lock = threading.Lock()
+
+_refresh_lock = threading.Lock()
+_entry_memo = {}
+_background_refresh = set()
+_background_lock = threading.Lock()
+
+
+def _location_cache_key(location):
+    return CACHE_KEY if location == DEFAULT_LOCATION else f"{CACHE_KEY}:{location}"
+
+
+def _today():
+    """
+    Tämä päivä Suomen ajassa. Kaikki sovelluksen päivämäärät kulkevat
+    scrapers._today_finland-funktion kautta, jotta bench.fixed_today kiinnittää
+    koko pinon (myös pyyntöpolun) samaan päivään.
+    """
+    return scrapers._today_finland()
+
+
+def _cache_overdue(entry, now):
+    """
+    Palauttaa montako sekuntia tämän päivän välimuistimerkintä on yli vanhenemisajan
+    hetkellä now (time.time()) (negatiivinen = tuore) tai None jos merkintää ei voi käyttää.
+    """
+    if (entry is None or entry.get("data") is None or "generation" not in entry
+            or entry.get("date") != _today().isoformat()):
+        return None
+    expires = entry.get("expires", entry["timestamp"] + CACHE_TTL_SECONDS)
+    return now - expires
+
+
+def _read_entry(location=DEFAULT_LOCATION):
+    """Lukee sijainnin päivän merkinnän; purettu merkintä pidetään muistissa kunnes taustan versio muuttuu."""
+    key = _location_cache_key(location)
+    version = _cache.version(key)
+    if version is None and not _snapshot_loaded:
+        _load_snapshot()
+        version = _cache.version(key)
+    if version is None:
+        return None
+    memo = _entry_memo.get(location)
+    if memo is None or version != memo[0]:
+        entry = _cache.get(key)
+        if entry is not None:
+            entry["data"] = models.load_payload(entry.get("data"))
+        memo = (version, entry)
+        _entry_memo[location] = memo
+        _remember_generation(location, memo[1])
+    return memo[1]
+
+
+def _generation(data):
+    """Datan tiiviste, josta tulee vastausten ETag ja live-päivitysten tunniste."""
+    return hashlib.sha1(models.dumps(data, sort_keys=True)).hexdigest()[:20]
+
+
+def _store_entry(location, data, expires):
+    """Tallentaa sijainnin päivän datan. generation on datan tiiviste, josta tulee vastausten ETag."""
+    entry = {
+        "data": data,
+        "timestamp": time.time(),
+        "date": _today().isoformat(),
+        "expires": expires,
+        "generation": _generation(data),
+    }
+    _cache.set(_location_cache_key(location), entry)
+    _remember_generation(location, entry)
+    with _live_changed:
+        _live_changed.notify_all()
+    return entry
+
+
+def _write_snapshot():
+    """
+    Tallentaa päivän sijaintimerkinnät ja ravintolakohtaiset merkinnät vedokseen
+    (kirjoitus väliaikaistiedostoon ja os.replace, joten lukija ei näe puolikasta
+    tiedostoa). Tyhjä data ei korvaa edellistä toimivaa vedosta.
+    """
+    if not SNAPSHOT_PATH:
+        return
+    today = _today().isoformat()
+    locations = {}
+    for location in LOCATIONS:
+        entry = _cache.get(_location_cache_key(location))
+        if entry is not None and entry.get("date") == today and (entry.get("data") or {}).get("restaurants"):
+            locations[location] = entry
+    if not locations:
+        return
+    restaurants = {}
+    for key in location_keys(list(LOCATIONS)):
+        entry = _cache.get(RESTAURANT_KEY_PREFIX + key)
+        if entry is not None and entry.get("date") == today:
+            restaurants[key] = entry
+
+    snapshot = {"date": today, "timestamp": time.time(), "locations": locations, "restaurants": restaurants}
+    tmp = f"{SNAPSHOT_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(SNAPSHOT_PATH) or ".", exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(models.dumps(snapshot))
+        os.replace(tmp, SNAPSHOT_PATH)
+    except OSError as e:
+        app.logger.warning(f"Tilannevedoksen tallennus epäonnistui: {e}")
+
+
+def _load_snapshot():
+    """
+    Lataa vedoksen tyhjiin välimuistimerkintöihin kerran per prosessi, jos se on
+    tältä päivältä. Liian vanha sijaintimerkintä merkitään juuri vanhentuneeksi,
+    jolloin se tarjoillaan heti ja päivitetään taustalla (stale-while-revalidate).
+    """
+    global _snapshot_loaded
+    with _snapshot_lock:
+        if _snapshot_loaded:
+            return
+        _snapshot_loaded = True
+        if not SNAPSHOT_PATH:
+            return
+        try:
+            with open(SNAPSHOT_PATH, "rb") as f:
+                snapshot = models.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            app.logger.warning(f"Tilannevedoksen lukeminen epäonnistui: {e}")
+            return
+
+        now = time.time()
+        if snapshot.get("date") != _today().isoformat():
+            return
+        for key, entry in snapshot.get("restaurants", {}).items():
+            if key in FETCHERS and _cache.version(RESTAURANT_KEY_PREFIX + key) is None:
+                _cache.set(RESTAURANT_KEY_PREFIX + key, entry)
+        loaded = []
+        for location, entry in snapshot.get("locations", {}).items():
+            key = _location_cache_key(location)
+            if location not in LOCATIONS or _cache.version(key) is not None:
+                continue
+            if now - entry["expires"] >= CACHE_MAX_STALE_SECONDS:
+                entry["expires"] = now - 1
+            _cache.set(key, entry)
+            loaded.append(location)
+        if loaded:
+            app.logger.info(f"Tilannevedos ladattu: {', '.join(loaded)}")
+
+
+def _refresh_due_restaurants(force=False, locations=(DEFAULT_LOCATION,)):
+    """
+    Hakee sijaintien vanhentuneet ja rikki olevat ravintolat yhdellä
+    hakusuunnitelmalla (jaettu sivu haetaan kerran) ja kokoaa kunkin sijainnin
+    päivän datan ravintolakohtaisista merkinnöistä.
+    Palauttaa {sijainti: (data, vanhenemishetki)}.
+    """
+    now = time.time()
+    today = _today()
+    entries = {}
+    due = []
+    for key in location_keys(locations):
+        entry = _cache.get(RESTAURANT_KEY_PREFIX + key)
+        if entry is not None and entry["date"] != today.isoformat():
+            entry = None
+        entries[key] = entry
+        if entry is None:
+            due.append(key)
+        elif now < entry["retry_at"]:
+            continue  # backoff käynnissä
+        elif force or not entry["ok"] or now - entry["timestamp"] >= RESTAURANT_TTL_SECONDS:
+            due.append(key)
+
+    if due and today.weekday() < 5:
+        # Erääntyneet ravintolat haetaan sivulta, ei viikkoindeksista (korjatut menut)
+        results = fetch_restaurants(due, today, refresh=True)
+        for key, result in results.items():
+            prev = entries[key]
+            if result is not None and not result.get("failed"):
+                entry = {"result": result, "timestamp": now, "ok": True, "failures": 0, "retry_at": 0}
+                _record_history(today, key, result)
+            else:
+                failures = (prev["failures"] if prev else 0) + 1
+                delay = min(FAILURE_BACKOFF_SECONDS * 2 ** (failures - 1), FAILURE_BACKOFF_MAX_SECONDS)
+                app.logger.warning(f"{key}: haku epäonnistui {failures}. kerran, uusi yritys {delay} s kuluttua")
+                # Säilytä viimeisin toimiva menu
+                last_good = prev["result"] if prev and prev.get("result") and not prev["result"].get("failed") else result
+                entry = {
+                    "result": last_good,
+                    "timestamp": prev["timestamp"] if prev else now,
+                    "ok": False,
+                    "failures": failures,
+                    "retry_at": now + delay,
+                }
+            entry["date"] = today.isoformat()
+            _cache.set(RESTAURANT_KEY_PREFIX + key, entry)
+            entries[key] = entry
+
+    payloads = {}
+    for location in locations:
+        restaurants = []
+        expires = now + CACHE_TTL_SECONDS
+        keys = LOCATIONS[location]["restaurants"]
+        for key in keys:
+            entry = entries[key]
+            if entry is None:
+                continue
+            if entry["ok"]:
+                expires = min(expires, entry["timestamp"] + RESTAURANT_TTL_SECONDS)
+            else:
+                expires = min(expires, entry["retry_at"])
+            if entry["result"] is not None:
+                result = models.Restaurant.from_dict(entry["result"])
+                if not entry["ok"] and not result.failed:
+                    result = replace(result, stale=True)
+                restaurants.append(result)
+
+        partial = len(restaurants) < len(keys)
+        payloads[location] = (make_payload(restaurants, today, partial=partial, location=location), expires)
+    return payloads
+
+
+def _record_history(day, key, result):
+    if _history is None or not result.get("menu"):
+        return
+    try:
+        _history.record(day, key, result)
+    except Exception as e:
+        app.logger.warning(f"{key}: menuhistorian tallennus epäonnistui: {e}")
+
+
+def refresh_restaurants(force=False, location=DEFAULT_LOCATION):
+    """Scrapaa ja tallentaa sijainnin datan välimuistiin (ks. _refresh_entries). Palauttaa datan."""
+    return _refresh_entries(force, [location])[location]["data"]
+
+
+def refresh_all_locations(force=False):
+    """Päivittää kaikki sijainnit yhdellä haulla. Palauttaa {sijainti: data}."""
+    return {location: entry["data"] for location, entry in _refresh_entries(force, list(LOCATIONS)).items()}
+
+
+def _refresh_entries(force=False, locations=(DEFAULT_LOCATION,)):
+    """
+    Scrapaa ja tallentaa sijaintien datan välimuistiin (single-flight).
+    Palauttaa {sijainti: merkintä}.
+
+    Vain vanhentuneet tai rikki olevat ravintolat haetaan uudelleen; force
+    hakee kaikki paitsi backoffissa olevat. Usean sijainnin yhteiset
+    ravintolat ja lähdesivut haetaan kerran.
+
+    Prosessin sisällä päivitys kulkee _refresh_lock-lukon läpi ja prosessien
+    välillä taustan lukon kautta. Jos toinen prosessi on jo päivittämässä,
+    odotetaan sen tulosta enintään REFRESH_WAIT_SECONDS. Ilman force-lippua
+    palautetaan suoraan tuore data, jonka joku muu ehti jo hakea.
+    """
+    requested = time.time()
+    with _refresh_lock:
+        now = time.time()
+        entries = {location: _read_entry(location) for location in locations}
+
+        def usable(entry):
+            overdue = _cache_overdue(entry, now)
+            return overdue is not None and (entry["timestamp"] >= requested or (not force and overdue < 0))
+
+        if all(usable(entry) for entry in entries.values()):
+            return entries
+
+        owner = _cache.acquire(REFRESH_LOCK_NAME, REFRESH_LOCK_TTL_SECONDS)
+        if owner is None:
+            # Toinen worker päivittää - odota sen tulosta
+            deadline = time.monotonic() + REFRESH_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(0.2)
+                entries = {location: _read_entry(location) for location in locations}
+                if all(entry is not None and entry["timestamp"] >= requested and entry["data"] is not None
+                       for entry in entries.values()):
+                    return entries
+                owner = _cache.acquire(REFRESH_LOCK_NAME, REFRESH_LOCK_TTL_SECONDS)
+                if owner is not None:
+                    break
+
+        try:
+            payloads = _refresh_due_restaurants(force, locations)
+            entries = {location: _store_entry(location, data, expires)
+                       for location, (data, expires) in payloads.items()}
+            _write_snapshot()
+            return entries
+        finally:
+            if owner is not None:
+                _cache.release(REFRESH_LOCK_NAME, owner)
+
+
+def _refresh_in_background(location=DEFAULT_LOCATION):
+    """Käynnistää sijainnin taustapäivityksen, ellei sellainen ole jo käynnissä tässä prosessissa."""
+    with _background_lock:
+        if location in _background_refresh:
+            return
+        _background_refresh.add(location)
+
+    def run():
+        try:
+            refresh_restaurants(location=location)
+        except Exception as e:
+            app.logger.error(f"Taustapäivitys epäonnistui ({location}): {e}")
+        finally:
+            with _background_lock:
+                _background_refresh.discard(location)
+
+    threading.Thread(target=run, name=f"cache-refresh-{location}", daemon=True).start()
+
+
+def lookup_entry(location=DEFAULT_LOCATION):
+    """
+    Palauttaa (merkintä, tila) ilman scrapausta: "hit" = tuore, "stale" =
+    vanhentunut mutta käyttökelpoinen (taustapäivitys käynnistetty) tai "miss".
+    """
+    now = time.time()
+    entry = _read_entry(location)
+    overdue = _cache_overdue(entry, now)
+
+    if overdue is not None and overdue < 0:
+        state = "hit"
+    elif overdue is not None and overdue < CACHE_MAX_STALE_SECONDS:
+        state = "stale"
+        _refresh_in_background(location)
+    else:
+        state = "miss"
+    metrics.CACHE_LOOKUPS.inc(location=location, result=state)
+    return entry, state
+
+
+def get_cached_entry(location=DEFAULT_LOCATION):
+    """
+    Hakee sijainnin päivän välimuistimerkinnän tai päivittää sen.
+    Vanhentunut mutta saman päivän data palautetaan heti ja päivitetään taustalla.
+    """
+    entry, state = lookup_entry(location)
+    if state == "miss":
+        return _refresh_entries(False, [location])[location]
+    return entry
+
+
+def get_cached_restaurants(location=DEFAULT_LOCATION):
+    """Hakee sijainnin ravintoladata välimuistista tai päivittää sen."""
+    return get_cached_entry(location)["data"]
+
+
+def _requested_day(value=None):
+    """Palauttaa pyynnön ?day=-parametrin (tai annetun arvon) päivän tai vastaa 400."""
+    day = parse_day(request.args.get("day") if value is None else value)
+    if day is None:
+        abort(400, description="Tuntematon päivä. Käytä esim. today, tomorrow, torstai tai 2026-02-05.")
+    return day
+
+
+# ============================================================
+# VALMIIKSI RENDERÖIDYT VASTAUKSET
+# Sivu ja JSON renderöidään kerran per välimuistin sukupolvi (generation) ja
+# pakataan valmiiksi gzip- ja brotli-muotoon. Osuma on pelkkä tavukopio, ja
+# If-None-Match-pyyntö saa 304-vastauksen. Ruokavaliolla suodatettu JSON
+# (?diet=G,VE) on oma varianttinsa, joten suodatus tehdään kerran per sukupolvi.
+# ============================================================
+
+CACHE_CONTROL = "public, no-cache"
+_RENDERED_MAX = 64 * len(LOCATIONS)
+_rendered = {}
+_render_lock = threading.Lock()
+
+
+def _build_variants(body):
+    variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body)
+    return variants
+
+
+def _pick_encoding(variants):
+    for encoding in ("br", "gzip"):
+        if encoding in variants and request.accept_encodings[encoding]:
+            return encoding
+    return "identity"
+
+
+def variant_etag(kind, generation, encoding):
+    """Vahva ETag yksilöi tarkat tavut, joten jokaisella pakkauksella on oma tunnisteensa."""
+    etag = f"{kind}-{generation}"
+    return etag if encoding == "identity" else f"{etag}-{encoding}"
+
+
+def rendered_variants(kind, path, entry, render):
+    """
+    Entryn datasta renderöity ja pakattu vastaus {koodaus: tavut}; renderöidään
+    kerran per sukupolvi. Lukko pitää renderöinnin yhtenä, kun täyttöä odottaneet
+    pyynnöt heräävät yhtä aikaa (brotli on selvästi gzipiä raskaampi).
+    """
+    key = (kind, path, entry["generation"])
+    variants = _rendered.get(key)
+    if variants is not None:
+        return variants
+    with _render_lock:
+        variants = _rendered.get(key)
+        if variants is None:
+            variants = _build_variants(render(entry["data"]))
+            if len(_rendered) >= _RENDERED_MAX:
+                _rendered.clear()
+            _rendered[key] = variants
+    return variants
+
+
+def _cached_response(kind, mimetype, entry, render):
+    """Palauttaa entryn datasta renderöidyn vastauksen välimuistista, ETagilla ja pakattuna."""
+    variants = rendered_variants(kind, request.path, entry, render)
+    encoding = _pick_encoding(variants)
+    etag = variant_etag(kind, entry["generation"], encoding)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(variants[encoding], mimetype=mimetype)
+        if encoding != "identity":
+            resp.headers["Content-Encoding"] = encoding
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = CACHE_CONTROL
+    resp.vary.add("Accept-Encoding")
+    return resp
+
 
-def get_cached_restaurants():
-    """Hakee ravintoladata välimuistista tai päivittää sen."""
-    now = datetime.now(FINLAND_TZ)
-    today = now.date()
+def _render_index(data):
+    generation = _generation(data) if LIVE_UPDATES else None
+    return render_template("index.html", data=data, generation=generation).encode("utf-8")
 
-    if (
-        _cache["data"] is not None
-        and _cache["timestamp"] is not None
-        and _cache["date"] == today
-        and (now - _cache["timestamp"]).total_seconds() < CACHE_TTL_SECONDS
-    ):
-        return _cache["data"]
 
-    data = fetch_all_restaurants()
-    _cache["data"] = data
-    _cache["timestamp"] = now
-    _cache["date"] = today
-    return data
+def _render_json(data):
+    return models.dumps(data)
+
+
+def json_variant(diet=0):
+    """(laji, renderöintifunktio) JSON-vastaukselle; diet on ruokavalioiden bittijoukko."""
+    if not diet:
+        return "json", _render_json
+    return f"json-diet-{diet}", lambda data: _render_json(diets.filter_payload(data, diet))
+
+
+def _requested_diet():
+    diet = diets.parse(request.args.get("diet"))
+    if diet is None:
+        abort(400, description=f"Tuntematon ruokavalio. Käytä esim. {','.join(diets.TAGS)} tai gluteeniton.")
+    return diet
+
+
+def _other_day(day, location):
+    """
+    Muun kuin kuluvan päivän data viikkoindeksista ilman hakua. Indeksi täyttyy
+    tämän päivän päivityksestä, joka kulkee välimuistin, single-flightin ja
+    backoffin kautta (sivut sisältävät koko viikon).
+    """
+    get_cached_entry(location)
+    return indexed_restaurants(day, location)
+
+
+def _location(location):
+    if location not in LOCATIONS:
+        abort(404, description=f"Tuntematon sijainti. Vaihtoehdot: {', '.join(LOCATIONS)}.")
+    return location
 
 
 @app.route("/")
-def index():
-    """Pääsivu - näyttää lounaslistat."""
-    data = get_cached_restaurants()
-    return render_template("index.html", data=data)
+@app.route("/<location>")
+def index(location=DEFAULT_LOCATION):
+    """Pääsivu - näyttää sijainnin lounaslistat (oletussijainti osoitteessa /)."""
+    location = _location(location)
+    day = _requested_day()
+    if day == _today():
+        return _cached_response("html", "text/html", get_cached_entry(location), _render_index)
+    return render_template("index.html", data=_other_day(day, location))
 
 
 @app.route("/api/restaurants")
-def api_restaurants():
-    """JSON API lounaslistoille."""
-    data = get_cached_restaurants()
-    return jsonify(data)
+@app.route("/api/<location>/restaurants")
+def api_restaurants(location=DEFAULT_LOCATION):
+    """
+    JSON API sijainnin lounaslistoille. Valinnainen ?day=today|tomorrow|torstai|2026-02-05
+    ja ?diet=G,VE (vain ruokalajit joissa kaikki merkinnät; ruokalajin "diet" on bittijoukko,
+    ks. diets.TAGS).
+    """
+    location = _location(location)
+    day = _requested_day()
+    diet = _requested_diet()
+    if day == _today():
+        kind, render = json_variant(diet)
+        return _cached_response(kind, "application/json", get_cached_entry(location), render)
+    data = _other_day(day, location)
+    return jsonify(diets.filter_payload(data, diet) if diet else data)
+
+
+@app.route("/api/locations")
+def api_locations():
+    """Sijainnit ja niiden ravintolat."""
+    return jsonify(locations_payload())
+
+
+def locations_payload():
+    return {key: {"name": spec.get("name", ""), "restaurants": spec["restaurants"]}
+            for key, spec in LOCATIONS.items()}
+
+
+# ============================================================
+# LIVE-PÄIVITYKSET
+# /api/<sijainti>/events on Server-Sent Events -striimi: kun välimuistin data
+# vaihtuu, asiakas saa vain muuttuneiden ravintoloiden kortit valmiiksi
+# renderöityinä ja sivun skripti vaihtaa ne paikalleen. Muutos huomataan
+# välimuistin versiosta, joten toisen workerin tai ajastimen päivitys näkyy
+# viimeistään LIVE_POLL_SECONDS sekunnissa. Saman muutoksen tapahtuma
+# renderöidään kerran kaikille asiakkaille.
+#
+# Sivu avaa striimin vain kun LIVE_UPDATES on päällä. asgi.py kytkee sen
+# päälle, koska se pitää striimit tapahtumasilmukassa; synkronisessa WSGI-
+# palvelimessa (gunicorn app:app) jokainen avoin välilehti varaisi workerin
+# LIVE_STREAM_SECONDS ajaksi. LOUNAS_LIVE_UPDATES=1 pakottaa päälle.
+# ============================================================
+
+LIVE_UPDATES = os.environ.get("LOUNAS_LIVE_UPDATES") == "1"
+LIVE_POLL_SECONDS = 2.0
+LIVE_HEARTBEAT_SECONDS = 15.0
+# Synkroninen worker on varattu striimin ajan; selain yhdistää uudelleen (Last-Event-ID)
+LIVE_STREAM_SECONDS = 300.0
+LIVE_RETRY_MS = 5000
+_LIVE_MAX = 8 * len(LOCATIONS)
+_live_seen = {}
+_live_events = {}
+_live_changed = threading.Condition()
+
+
+def _remember_generation(location, entry):
+    if entry is None or "generation" not in entry:
+        return
+    if len(_live_seen) >= _LIVE_MAX:
+        _live_seen.clear()
+    _live_seen[(location, entry["generation"])] = entry["data"]
+
+
+def _live_diff(old, new):
+    """Muuttuneet ja poistuneet ravintolat; ilman vanhaa dataa kaikki kortit."""
+    before = {r["name"]: r for r in old["restaurants"]} if old is not None else {}
+    names = [r["name"] for r in new["restaurants"]]
+    card = get_template_attribute("card.html", "card")
+    return {
+        "full": old is None,
+        "date": new.get("date"),
+        "fetch_time": new.get("fetch_time"),
+        "message": new.get("message"),
+        "order": names,
+        "cards": {r["name"]: str(card(r)) for r in new["restaurants"] if before.get(r["name"]) != r},
+        "removed": [name for name in before if name not in names],
+    }
+
+
+def live_event(location, since=None):
+    """
+    Palauttaa (SSE-tapahtuma tavuina tai None, uusi sukupolvi). Tapahtuma
+    syntyy vain jos sijainnin välimuistin sukupolvi eroaa since-arvosta.
+    """
+    entry = _read_entry(location)
+    if entry is None or entry["generation"] == since:
+        return None, since
+    key = (location, since, entry["generation"])
+    event = _live_events.get(key)
+    if event is None:
+        with app.app_context():
+            diff = _live_diff(_live_seen.get((location, since)), entry["data"])
+        event = b"id: %s\nevent: menu\ndata: %s\n\n" % (entry["generation"].encode(), models.dumps(diff))
+        if len(_live_events) >= _LIVE_MAX:
+            _live_events.clear()
+        _live_events[key] = event
+    return event, entry["generation"]
+
+
+@app.route("/api/events")
+@app.route("/api/<location>/events")
+def live_events(location=DEFAULT_LOCATION):
+    """SSE-striimi sijainnin menumuutoksista. ?since=<sukupolvi> tai Last-Event-ID."""
+    location = _location(location)
+    since = request.args.get("since") or request.headers.get("Last-Event-ID")
+
+    def stream(since):
+        yield f"retry: {LIVE_RETRY_MS}\n\n".encode()
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < LIVE_STREAM_SECONDS:
+            event, since = live_event(location, since)
+            if event is not None:
+                yield event
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= LIVE_HEARTBEAT_SECONDS:
+                yield b": ping\n\n"
+                last_sent = time.monotonic()
+            with _live_changed:
+                _live_changed.wait(LIVE_POLL_SECONDS)
+
+    return Response(stream(since), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ============================================================
+# MENUHISTORIA
+# Vastataan history.py:n tietokannasta, ravintoloiden sivuihin ei kosketa.
+# ============================================================
+
+def _history_store():
+    if _history is None:
+        abort(404, description="Menuhistoria ei ole käytössä.")
+    return _history
+
+
+@app.route("/api/history/<day>")
+def api_history_day(day):
+    """Päivän menut historiasta, esim. /api/history/2026-02-05."""
+    day = _requested_day(day)
+    return jsonify({"date": day.isoformat(), "restaurants": _history_store().on_day(day)})
+
+
+@app.route("/api/history/week")
+def api_history_week():
+    """Viikon menut historiasta. Valinnainen ?day= valitsee viikon (oletus kuluva)."""
+    day = _requested_day()
+    year, week, _ = day.isocalendar()
+    return jsonify({"week": f"{year}-W{week:02d}", "days": _history_store().week(day)})
+
+
+@app.route("/api/history/last-served")
+def api_history_last_served():
+    """Milloin ruokaa ?q= viimeksi tarjottiin. Valinnainen ?restaurant=oasis rajaa ravintolaan."""
+    text = request.args.get("q", "").strip()
+    if not text:
+        abort(400, description="Anna haettava ruoka parametrilla ?q=.")
+    restaurant = request.args.get("restaurant") or None
+    if restaurant is not None and restaurant not in FETCHERS:
+        abort(400, description=f"Tuntematon ravintola. Vaihtoehdot: {', '.join(FETCHERS)}.")
+    found = _history_store().last_served(text, restaurant)
+    if found is None:
+        abort(404, description="Ruokaa ei löytynyt historiasta.")
+    return jsonify(found)
+
+
+# ============================================================
+# RUOKAHAKU
+# Käänteinen indeksi (ks. search.py) rakennetaan menuhistoriasta ensimmäisellä
+# haulla. Kun jonkin sijainnin päivän merkintä vaihtuu (scrapaus tässä tai
+# toisessa workerissa), indeksiin luetaan uudelleen vain sen päivän rivit.
+# ============================================================
+
+_search_index = search.SearchIndex()
+_search_sync = {"loaded": False, "version": None}
+_search_lock = threading.Lock()
+
 
+def _synced_search_index():
+    store = _history_store()
+    with _search_lock:
+        if not _search_sync["loaded"]:
+            for day, restaurants in store.between(date.min, date.max).items():
+                _search_index.replace_day(day, restaurants)
+            _search_sync["loaded"] = True
+        version = tuple(_cache.version(_location_cache_key(location)) for location in LOCATIONS)
+        if version != _search_sync["version"]:
+            days = {entry["date"] for entry in map(_read_entry, LOCATIONS) if entry is not None}
+            for day in days:
+                _search_index.replace_day(day, store.on_day(date.fromisoformat(day)))
+            _search_sync["version"] = version
+    return _search_index
 
-@app.route("/refresh")
+
+@app.route("/api/search")
+def api_search():
+    """Ruokahaku koko menuhistoriasta: ?q=hernekeitto, valinnaisesti ?day=today ja ?limit=50."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        abort(400, description="Anna hakusana parametrilla ?q=.")
+    day = _requested_day().isoformat() if request.args.get("day") else None
+    limit = max(1, min(request.args.get("limit", 50, type=int), 500))
+    results = _synced_search_index().search(query, day=day, limit=limit)
+    return jsonify({"q": query, "count": len(results), "results": results})
+
+
+# ============================================================
+# PÄIVITYSTYÖT
+# /refresh ei scrapaa pyynnön sisällä vaan luo taustatyön ja palaa heti.
+# Työ päivittää kaikki sijainnit yhdellä hakusuunnitelmalla.
+# Käynnissä olevaan työhön liitytään, ja juuri valmistuneen työn jälkeen on
+# jäähdytysaika, joten toistuvat klikkaukset johtavat yhteen scrapaukseen.
+# Epäonnistuneen työn jälkeen jäähdytys on lyhyempi, mutta sekin estää
+# klikkauksia käynnistämästä uutta täyttä scrapausta, kun lähteet ovat rikki.
+# Työn tila on välimuistitaustassa, joten mikä tahansa worker voi vastata.
+# Uutta työtä luotaessa REFRESH_JOB_TIMEOUT_SECONDS vanhemmat työt poistetaan,
+# joten taustaan jää vain muutama viimeisin työ.
+# ============================================================
+
+REFRESH_COOLDOWN_SECONDS = 120
+REFRESH_FAILURE_COOLDOWN_SECONDS = 30
+REFRESH_JOB_TIMEOUT_SECONDS = 300  # kesken jäänyt työ (esim. worker kaatui) hylätään tämän jälkeen
+REFRESH_JOB_PREFIX = "refresh-job:"
+REFRESH_JOB_CURRENT = REFRESH_JOB_PREFIX + "current"
+REFRESH_JOB_LOCK = REFRESH_JOB_PREFIX + "create"
+REFRESH_JOB_RECENT = REFRESH_JOB_PREFIX + "recent"
+
+
+def _save_job(job):
+    _cache.set(REFRESH_JOB_PREFIX + job["id"], job)
+    _cache.set(REFRESH_JOB_CURRENT, {"id": job["id"]})
+    return job
+
+
+def _update_job(job):
+    """Tallentaa työn tilan, ellei työtä ole jo poistettu vanhentuneena (ks. _prune_jobs)."""
+    if get_refresh_job(job["id"]) is not None:
+        _cache.set(REFRESH_JOB_PREFIX + job["id"], job)
+    return job
+
+
+def _prune_jobs(now):
+    """
+    Poistaa REFRESH_JOB_TIMEOUT_SECONDS vanhemmat työt taustasta ja palauttaa
+    jäljelle jääneet [[id, luotu], ...]. Kutsutaan REFRESH_JOB_LOCK-lukon alla.
+    """
+    recent = []
+    for job_id, requested in _cache.get(REFRESH_JOB_RECENT) or []:
+        if now - requested < REFRESH_JOB_TIMEOUT_SECONDS:
+            recent.append([job_id, requested])
+        else:
+            _cache.delete(REFRESH_JOB_PREFIX + job_id)
+    return recent
+
+
+def get_refresh_job(job_id):
+    return _cache.get(REFRESH_JOB_PREFIX + job_id)
+
+
+def _run_refresh_job(job):
+    job = _update_job(dict(job, status="running", started=time.time()))
+    try:
+        _refresh_entries(True, list(LOCATIONS))
+        _update_job(dict(job, status="done", finished=time.time()))
+    except Exception as e:
+        app.logger.error(f"Päivitystyö {job['id']} epäonnistui: {e}")
+        _update_job(dict(job, status="failed", finished=time.time(), error=str(e)))
+
+
+def enqueue_refresh():
+    """
+    Palauttaa (työ, uusi) - joko käynnissä olevan / jäähdytyksessä olevan työn
+    tai juuri käynnistetyn uuden taustatyön.
+    """
+    now = time.time()
+    owner = None
+    deadline = time.monotonic() + 5
+    while owner is None and time.monotonic() < deadline:
+        owner = _cache.acquire(REFRESH_JOB_LOCK, 10)
+        if owner is None:
+            time.sleep(0.05)
+    try:
+        current = _cache.get(REFRESH_JOB_CURRENT)
+        job = get_refresh_job(current["id"]) if current else None
+        if job is not None:
+            if job["status"] in ("queued", "running") and now - job["requested"] < REFRESH_JOB_TIMEOUT_SECONDS:
+                return job, False
+            if job["status"] == "done" and now - job["finished"] < REFRESH_COOLDOWN_SECONDS:
+                return job, False
+            if job["status"] == "failed" and now - job["finished"] < REFRESH_FAILURE_COOLDOWN_SECONDS:
+                return job, False
+
+        recent = _prune_jobs(now)
+        job = _save_job({"id": uuid.uuid4().hex[:12], "status": "queued", "requested": now})
+        _cache.set(REFRESH_JOB_RECENT, recent + [[job["id"], now]])
+    finally:
+        if owner is not None:
+            _cache.release(REFRESH_JOB_LOCK, owner)
+
+    threading.Thread(target=_run_refresh_job, args=(job,), name=f"refresh-{job['id']}", daemon=True).start()
+    return job, True
+
+
+def _job_json(job):
+    return dict(job, status_url=url_for("refresh_status", job_id=job["id"]))
+
+
+def _wants_json():
+    if request.args.get("format") == "json":
+        return True
+    best = request.accept_mimetypes.best_match(["text/html", "application/json"])
+    return best == "application/json"
+
+
+@app.route("/refresh", methods=["GET", "POST"])
 def refresh():
-    """Pakottaa datan päivityksen."""
-    _cache["data"] = None
-    _cache["timestamp"] = None
-    data = get_cached_restaurants()
-    return render_template("index.html", data=data)
+    """
+    Käynnistää (tai yhdistää) kaikkien sijaintien taustapäivityksen ja palaa heti.
+    Selain ohjataan takaisin ?location=-parametrin sijainnin sivulle.
+    """
+    job, _ = enqueue_refresh()
+    if _wants_json():
+        resp = jsonify(_job_json(job))
+        resp.status_code = 202
+        resp.headers["Location"] = url_for("refresh_status", job_id=job["id"])
+        return resp
+    location = request.args.get("location")
+    if location not in LOCATIONS or location == DEFAULT_LOCATION:
+        return redirect(url_for("index", refresh=job["id"]), code=303)
+    return redirect(url_for("index", location=location, refresh=job["id"]), code=303)
+
+
+@app.route("/refresh/<job_id>")
+def refresh_status(job_id):
+    """Päivitystyön tila: queued, running, done tai failed."""
+    job = get_refresh_job(job_id)
+    if job is None:
+        abort(404, description="Tuntematon päivitystyö.")
+    return jsonify(_job_json(job))
+
+
+# ============================================================
+# MITTARIT
+# Pyyntöjen kesto reiteittäin sekä scrapauksen ja välimuistin mittarit
+# (ks. metrics.py) Prometheuksen tekstimuodossa osoitteessa /metrics.
+# LOUNAS_TIMING_HEADER=1 lisää jokaiseen vastaukseen Server-Timing-otsakkeen.
+# ============================================================
+
+TIMING_HEADER = os.environ.get("LOUNAS_TIMING_HEADER") == "1"
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request(resp):
+    started = g.pop("request_started", None)
+    if started is None:
+        return resp
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else "(ei reittiä)"
+    if route != "/metrics":
+        metrics.REQUEST_SECONDS.observe(elapsed, route=route, method=request.method, status=resp.status_code)
+    if TIMING_HEADER:
+        resp.headers["Server-Timing"] = f"app;dur={elapsed * 1000:.2f}"
+    return resp
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Mittarit Prometheuksen tekstimuodossa."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Esilämmitysajastin web-prosessin sisällä (ks. scheduler.py). Vaihtoehtoisesti
+# ajastin voidaan ajaa erillisenä prosessina jaetulla välimuistilla:
+# LOUNAS_CACHE_BACKEND=sqlite python -m scheduler
+if os.environ.get("LOUNAS_SCHEDULER") == "1":
+    import scheduler
+    scheduler.start_in_background()
 
 
 if __name__ == "__main__":
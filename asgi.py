@@ -0,0 +1,375 @@
+"""
+Ruoholahden Lounas - ASGI-palvelin
+Asynkroninen sisaankaynti samalle sovellukselle:
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+Kuumat reitit (/, /<sijainti>, /api/restaurants ja /api/<sijainti>/restaurants
+tanaan) palvellaan suoraan tapahtumasilmukassa valmiiksi renderoidyista
+tavuista. Valimuistin ohitus odottaa scrapausta (await) tyosaikeessa, joten
+silmukka jatkaa muiden pyyntojen palvelemista; saman sijainnin samanaikaiset
+ohitukset odottavat yhta ja samaa hakua. Live-paivitysten SSE-striimit
+(/api/<sijainti>/events) pidetaan auki silmukassa ilman saietta per asiakas.
+Muut reitit ajetaan Flask-sovelluksella tyosaikeessa (WSGI), joten
+toiminnallisuus on sama kuin synkronisessa tilassa.
+"""
+
+import io
+import sys
+import time
+import asyncio
+from urllib.parse import parse_qs
+
+import app as web
+import metrics
+import diets
+from scrapers import parse_day, LOCATIONS, DEFAULT_LOCATION
+
+# Striimit pidetaan silmukassa, joten sivu voi avata ne (ks. app.LIVE_UPDATES)
+web.LIVE_UPDATES = True
+
+# Vastauksen laji -> (mimetype, renderointifunktio)
+KINDS = {
+    "html": ("text/html; charset=utf-8", web._render_index),
+    "json": ("application/json", web._render_json),
+}
+
+_inflight = {}
+_watchers = {}
+_changes = {}
+
+
+# ============================================================
+# ASYNKRONINEN VALIMUISTI
+# ============================================================
+
+async def get_cached_entry(location=DEFAULT_LOCATION):
+    """Kuten app.get_cached_entry, mutta ohituksessa scrapaus odotetaan tyosaikeessa."""
+    entry, state = web.lookup_entry(location)
+    if state != "miss":
+        return entry
+    task = _inflight.get(location)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(web._refresh_entries, False, [location]))
+        _inflight[location] = task
+        task.add_done_callback(lambda _: _inflight.pop(location, None))
+    entries = await asyncio.shield(task)
+    return entries[location]
+
+
+async def _variants(kind, path, entry, render):
+    """Renderoidyt tavut; renderointi (kerran per sukupolvi) tehdaan tyosaikeessa."""
+    key = (kind, path, entry["generation"])
+    variants = web._rendered.get(key)
+    if variants is not None:
+        return variants
+
+    def run():
+        with web.app.app_context():
+            return web.rendered_variants(kind, path, entry, render)
+
+    return await asyncio.to_thread(run)
+
+
+# ============================================================
+# LIVE-PAIVITYKSET
+# Yksi kysely per sijainti ja app.LIVE_POLL_SECONDS kaikille striimeille;
+# muutos herattaa sijainnin striimit, jotka hakevat tapahtuman app.live_eventilta.
+# ============================================================
+
+async def _watch(location):
+    seen = None
+    while True:
+        entry = await asyncio.to_thread(web._read_entry, location)
+        generation = entry["generation"] if entry else None
+        if generation != seen:
+            seen = generation
+            waiter = _changes.pop(location, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(generation)
+        await asyncio.sleep(web.LIVE_POLL_SECONDS)
+
+
+async def wait_for_change(location, timeout):
+    """Odottaa sijainnin datan vaihtumista enintaan timeout sekuntia; False = aikakatkaisu."""
+    if location not in _watchers:
+        _watchers[location] = asyncio.ensure_future(_watch(location))
+    waiter = _changes.get(location)
+    if waiter is None:
+        waiter = _changes[location] = asyncio.get_running_loop().create_future()
+    try:
+        await asyncio.wait_for(asyncio.shield(waiter), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+# ============================================================
+# HTTP-APUFUNKTIOT
+# ============================================================
+
+def _headers(scope):
+    headers = {}
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").lower()
+        value = value.decode("latin-1")
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+    return headers
+
+
+def _accepts(header, encoding):
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() not in (encoding, "*"):
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+def _etag_matches(header, etag):
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def _native_route(scope):
+    """
+    Palauttaa (reitti, laji, sijainti, ruokavalio) suoraan palveltavalle pyynnolle
+    tai None, jolloin pyynnon hoitaa Flask (myos virheelliset parametrit).
+    SSE-striimit palvellaan aina tassa: ne eivat kayta ?day- eika ?diet-
+    parametreja, ja Flaskin kautta striimi varaisi tyosaikeen koko elinajakseen.
+    """
+    if scope["method"] not in ("GET", "HEAD"):
+        return None
+    parts = scope["path"].strip("/").split("/")
+    if parts == ["api", "events"]:
+        return "/api/events", "events", DEFAULT_LOCATION, 0
+    if len(parts) == 3 and parts[0] == "api" and parts[2] == "events" and parts[1] in LOCATIONS:
+        return "/api/<location>/events", "events", parts[1], 0
+
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if "day" in query and parse_day(query["day"][-1]) != parse_day(None):
+        return None
+    diet = diets.parse(query["diet"][-1]) if "diet" in query else 0
+    if diet is None:
+        return None
+
+    if parts == [""]:
+        return "/", "html", DEFAULT_LOCATION, 0
+    if len(parts) == 1 and parts[0] in LOCATIONS:
+        return "/<location>", "html", parts[0], 0
+    if parts == ["api", "restaurants"]:
+        return "/api/restaurants", "json", DEFAULT_LOCATION, diet
+    if len(parts) == 3 and parts[0] == "api" and parts[2] == "restaurants" and parts[1] in LOCATIONS:
+        return "/api/<location>/restaurants", "json", parts[1], diet
+    return None
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _wait_disconnect(receive):
+    """Odottaa asiakkaan http.disconnect-viestia (pyynnon runko on jo luettu)."""
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send(send, status, headers, body=b"", head=False):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+    })
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+# ============================================================
+# REITIT
+# ============================================================
+
+async def _serve_cached(scope, send, kind, location, diet=0):
+    """Valimuistin vastaus ETagilla ja valmiiksi pakattuna (vrt. app._cached_response)."""
+    mimetype, render = KINDS[kind]
+    if kind == "json":
+        kind, render = web.json_variant(diet)
+    entry = await get_cached_entry(location)
+    variants = await _variants(kind, scope["path"], entry, render)
+    request_headers = _headers(scope)
+    encoding = "identity"
+    for candidate in ("br", "gzip"):
+        if candidate in variants and _accepts(request_headers.get("accept-encoding", ""), candidate):
+            encoding = candidate
+            break
+    etag = web.variant_etag(kind, entry["generation"], encoding)
+    headers = [
+        ("ETag", f'"{etag}"'),
+        ("Cache-Control", web.CACHE_CONTROL),
+        ("Vary", "Accept-Encoding"),
+    ]
+    if _etag_matches(request_headers.get("if-none-match", ""), etag):
+        await _send(send, 304, headers)
+        return 304
+
+    body = variants[encoding]
+    headers.append(("Content-Type", mimetype))
+    headers.append(("Content-Length", str(len(body))))
+    if encoding != "identity":
+        headers.append(("Content-Encoding", encoding))
+    await _send(send, 200, headers, body, head=scope["method"] == "HEAD")
+    return 200
+
+
+async def _serve_events(scope, receive, send, location):
+    """SSE-striimi (vrt. app.live_events), auki kunnes asiakas katkaisee yhteyden."""
+    await _read_body(receive)
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    since = query.get("since", [None])[-1] or _headers(scope).get("last-event-id")
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no")],
+    })
+    await send({"type": "http.response.body", "body": f"retry: {web.LIVE_RETRY_MS}\n\n".encode(), "more_body": True})
+
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        while not disconnected.done():
+            event, since = await asyncio.to_thread(web.live_event, location, since)
+            if event is not None:
+                await send({"type": "http.response.body", "body": event, "more_body": True})
+            changed = asyncio.ensure_future(wait_for_change(location, web.LIVE_HEARTBEAT_SECONDS))
+            await asyncio.wait([changed, disconnected], return_when=asyncio.FIRST_COMPLETED)
+            if not changed.done():
+                changed.cancel()
+            elif not changed.result() and not disconnected.done():
+                await send({"type": "http.response.body", "body": b": ping\n\n", "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    except OSError:
+        # Asiakas katkaisi yhteyden kesken lahetyksen
+        return
+    finally:
+        disconnected.cancel()
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "REMOTE_ADDR": client[0],
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in _headers(scope).items():
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name == "content-length":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+    return environ
+
+
+async def _serve_wsgi(scope, receive, send):
+    """Ajaa pyynnon Flask-sovelluksella tyosaikeessa."""
+    environ = _wsgi_environ(scope, await _read_body(receive))
+
+    def run():
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+
+        result = web.app(environ, start_response)
+        try:
+            body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return started["status"], started["headers"], body
+
+    status, headers, body = await asyncio.to_thread(run)
+    await _send(send, status, headers, body)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            for task in _watchers.values():
+                task.cancel()
+            _watchers.clear()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI-sovellus."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    native = _native_route(scope)
+    if native is None:
+        await _serve_wsgi(scope, receive, send)
+        return
+
+    route, kind, location, diet = native
+    if kind == "events":
+        await _serve_events(scope, receive, send, location)
+        return
+    started = time.perf_counter()
+    if web.TIMING_HEADER:
+        # Server-Timing lisataan aloitusviestiin
+        original_send = send
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                elapsed = (time.perf_counter() - started) * 1000
+                message = dict(message, headers=[*message["headers"], (b"server-timing", f"app;dur={elapsed:.2f}".encode())])
+            await original_send(message)
+
+    status = await _serve_cached(scope, send, kind, location, diet)
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=scope["method"], status=status)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    print("\nLounasSiili (ASGI) kaynnistyy...")
+    print("   Avaa selaimessa: http://localhost:8000\n")
+    uvicorn.run("asgi:app", host="0.0.0.0", port=8000)
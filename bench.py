@@ -0,0 +1,603 @@
+"""
+Ruoholahden Lounas - Suorituskykymittaukset
+Ajetaan tallennetuilla sivuilla ilman verkkoyhteytta.
+
+    python -m bench record [--fixtures fixtures]
+    python -m bench parse [--fixtures fixtures] [--rounds 20]
+    python -m bench scrapers [--fixtures fixtures] [--rounds 10] [--save tulos.json] [--baseline baselines/scrapers.json]
+    python -m bench models [--fixtures fixtures] [--rounds 200] [--copies 500]
+    python -m bench load http://localhost:8000/ [--concurrency 32] [--duration 10]
+
+record hakee jokaisen ravintolan sivun verkosta ja tallentaa sen tiedostoon
+<avain>.html seka osoitteen manifest.json-tiedostoon.
+
+Repositorion fixtures/-sivut ovat synteettisia korvikkeita (manifestissa
+"synthetic": true): kunkin sivuston menurakenne muutamalla ruokalajilla ja
+navigaatiotaytteella. Niilla mitatut ajat kertovat koodin muutoksista, eivat
+oikeiden sivujen parsinnasta, ja jokainen mittaus muistuttaa siita. record
+korvaa ne oikeilla tallenteilla.
+
+parse vertaa kunkin ravintolan parsintaa eri tavoilla: koko sivu html.parserilla
+(alkuperainen tapa), koko sivu oletusparserilla, SoupStrainer-kohdistus ja
+selectolax-leikkaus (jos asennettu).
+
+scrapers ajaa jokaisen rekisterin ravintolan ja fetch_all_restaurants paikallista
+korvikepalvelinta vasten, joka tarjoilee tallennetut sivut. Jokaisesta
+raportoidaan parsinta-aika, muistin huippukaytto (tracemalloc) ja koko haun
+kesto. Valimuistit ohitetaan, joten luvut kuvaavat kylmaa hakua. Tulosta
+verrataan perustasoon baselines/scrapers.json (--baseline, tyhja = ei
+vertailua), ja virhekoodi palautetaan, jos jokin mittari on hidastunut yli
+--tolerance-rajan. Uusi perustaso tallennetaan --save-valitsimella.
+
+models vertaa paivan dataa tavallisina dicteina ja stdlib-JSONilla seka
+models.py:n malleina ja models.dumpsilla: sarjallistus- ja purkuaika seka
+--copies kopion viema muisti (kuten valimuistissa pidetyt merkinnat).
+
+load kuormittaa kaynnissa olevaa palvelinta (--concurrency samanaikaista
+keep-alive-yhteytta) ja raportoi lapaisyn seka viiveen persentiilit. Sama ajo
+kummallekin palvelutavalle vertaa synkronista ja asynkronista tilaa:
+
+    gunicorn app:app --workers 2 --threads 4 --bind :8000
+    uvicorn asgi:app --workers 2 --port 8000
+
+Mitattu fixtures-sivuilla (yksi prosessori, --concurrency 32, 10 s, lammin
+valimuisti): werkzeugin saikeistetty WSGI ~670-680 pyyntoa/s (p50 ~48 ms),
+ASGI-polku ~3900-4000 pyyntoa/s (p50 ~8 ms) seka / etta /api/restaurants.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import http.client
+import threading
+import statistics
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+import http_client
+import models
+import scrapers
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Tallennetut perustasot (--baseline oletus), mitattu fixtures/-sivuilla; paivitetaan
+# --save-valitsimella (myos kun sivut korvataan tallenteilla)
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+SCRAPER_METRICS = ("parse_ms", "e2e_ms", "alloc_kib")
+MANIFEST = "manifest.json"
+
+
+def parser_for(key):
+    """Ravintolan parseri ja sen lisaargumentit rekisterin strategiasta."""
+    strategy = scrapers.STRATEGIES[scrapers.RESTAURANTS[key]["parser"]]
+    return strategy["parse"], ((0,) if strategy.get("today_only") else ())
+
+
+# ============================================================
+# TALLENNETUT SIVUT
+# ============================================================
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def synthetic_keys(directory):
+    """Ravintolat joiden sivu on synteettinen korvike eika tallenne (manifestin synthetic-merkinta)."""
+    return sorted(key for key, entry in load_manifest(directory).items() if entry.get("synthetic"))
+
+
+def warn_synthetic(directory):
+    """Tulostaa huomautuksen, jos mittaus ajettiin synteettisilla sivuilla."""
+    keys = synthetic_keys(directory)
+    if keys:
+        print(f"HUOM: synteettiset sivut, ei tallenteita ({', '.join(keys)}). Luvut eivat kuvaa "
+              f"oikeiden sivujen parsintaa; korvaa ne: python -m bench record")
+
+
+def load_fixtures(directory):
+    """Palauttaa {avain: html} niille ravintoloille joilta loytyy tallennettu sivu."""
+    pages = {}
+    for key in scrapers.FETCHERS:
+        path = os.path.join(directory, f"{key}.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                pages[key] = f.read()
+    return pages
+
+
+@contextmanager
+def cold_caches():
+    """Ohittaa HTTP-levyvalimuistin, viikkoindeksin, jaetut sivut ja parsintamuistin."""
+    saved = (http_client.CACHE_DIR, scrapers.WEEK_INDEX_DIR)
+    http_client.CACHE_DIR = ""
+    scrapers.WEEK_INDEX_DIR = ""
+    scrapers._week_index.clear()
+    scrapers._pages.clear()
+    scrapers._parse_memo.clear()
+    try:
+        yield
+    finally:
+        http_client.CACHE_DIR, scrapers.WEEK_INDEX_DIR = saved
+        scrapers._week_index.clear()
+        scrapers._pages.clear()
+        scrapers._parse_memo.clear()
+
+
+@contextmanager
+def fixed_today(day):
+    """Ajaa scraperit ja sovelluksen ikaan kuin tanaan olisi `day` (viikonloppuna ei haeta mitaan)."""
+    original = scrapers._today_finland
+    scrapers._today_finland = lambda: day
+    try:
+        yield
+    finally:
+        scrapers._today_finland = original
+
+
+def bench_day():
+    """Kuluvan viikon arkipaiva: tanaan, tai viikonloppuna perjantai."""
+    today = scrapers._today_finland()
+    return today - timedelta(days=max(0, today.weekday() - 4))
+
+
+def record(directory):
+    """Hakee jokaisen ravintolan sivun verkosta ja tallentaa sen (jaettu sivu jokaiselle kayttajalleen)."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = load_manifest(directory)
+    original_get = http_client.get
+
+    def recording_get(url, *args, **kwargs):
+        resp = original_get(url, *args, **kwargs)
+        for key, spec in scrapers.RESTAURANTS.items():
+            if spec["url"] != url:
+                continue
+            with open(os.path.join(directory, f"{key}.html"), "w", encoding="utf-8") as f:
+                f.write(resp.text)
+            manifest[key] = {
+                "url": url,
+                "recorded": datetime.now(scrapers.FINLAND_TZ).isoformat(timespec="seconds"),
+                "bytes": len(resp.content),
+            }
+            print(f"  {key:<10} {len(resp.content):>9} tavua  {url}")
+        return resp
+
+    http_client.get = recording_get
+    try:
+        with cold_caches(), fixed_today(bench_day()):
+            for fetcher in scrapers.FETCHERS.values():
+                fetcher()
+    finally:
+        http_client.get = original_get
+
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+# ============================================================
+# KORVIKEPALVELIN
+# ============================================================
+
+class FixtureServer:
+    """
+    Paikallinen HTTP-palvelin joka tarjoilee tallennetut sivut polussa
+    /<host><polku>. latency lisaa viiveen (sekunteina) jokaiseen vastaukseen ja
+    failure_rate palauttaa satunnaisesti 503-virheen.
+    """
+
+    def __init__(self, pages_by_url, latency=0.0, failure_rate=0.0):
+        self.pages = {}
+        for url, body in pages_by_url.items():
+            parts = urlsplit(url)
+            self.pages[f"/{parts.netloc}{parts.path}"] = body.encode("utf-8")
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server.hits += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.pages.get(self.path.split("?", 1)[0])
+                if body is None or random.random() < server.failure_rate:
+                    self.send_response(404 if body is None else 503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name="fixture-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """Ohjaa jaetun sessionin pyynnot korvikepalvelimelle."""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+
+@contextmanager
+def replay(server, urls):
+    """
+    Reitittaa kaikki jaetun sessionin pyynnot korvikepalvelimelle. Osoitteet
+    joille ei ole tallennettua sivua saavat sielta 404-vastauksen, joten
+    mittaus ei koskaan kayta verkkoa (ei DNS-hakuja eika uudelleenyrityksia).
+    """
+    session = http_client.get_session()
+    hosts = {urlsplit(u).netloc for u in urls} | {urlsplit(s["url"]).netloc for s in scrapers.RESTAURANTS.values()}
+    # Kaikki hostit kulkevat saman paikallisen poolin kautta
+    adapter = _RedirectAdapter(server.base_url, pool_maxsize=len(hosts) * http_client.PER_HOST_LIMIT)
+    saved = session.adapters.copy()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    try:
+        yield
+    finally:
+        session.adapters = saved
+        adapter.close()
+
+
+@contextmanager
+def fixture_environment(directory, latency=0.0, failure_rate=0.0):
+    """Kaynnistaa korvikepalvelimen tallennetuille sivuille ja reitittaa scraperit sille."""
+    manifest = load_manifest(directory)
+    pages = load_fixtures(directory)
+    pages_by_url = {manifest[key]["url"]: html for key, html in pages.items() if key in manifest}
+    if not pages_by_url:
+        raise SystemExit(f"Tallennettuja sivuja ei loytynyt hakemistosta {directory} (aja ensin: python -m bench record)")
+    server = FixtureServer(pages_by_url, latency=latency, failure_rate=failure_rate).start()
+    try:
+        with replay(server, pages_by_url):
+            yield server, pages
+    finally:
+        server.stop()
+
+
+# ============================================================
+# MITTAUKSET
+# ============================================================
+
+def _time(func, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _allocations(func):
+    """Palauttaa (huippumuisti KiB, ajon jalkeen varattuna jaanyt muisti KiB) yhdesta ajosta."""
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - base) / 1024, (current - base) / 1024
+
+
+def bench_parse(pages, rounds):
+    """Palauttaa {avain: {tapa: mediaani ms}}."""
+    results = {}
+    for key, html in pages.items():
+        parse, args = parser_for(key)
+        target = scrapers.PARSE_TARGETS[parse.__name__]
+        variants = {
+            "html.parser": lambda: parse(BeautifulSoup(html, "html.parser"), *args),
+            scrapers.HTML_PARSER + " full": lambda: parse(scrapers.make_soup(html, mode="full"), *args),
+            "strainer": lambda: parse(scrapers.make_soup(html, target, mode="strainer"), *args),
+        }
+        if scrapers.FastHTMLParser is not None:
+            variants["selectolax"] = lambda: parse(scrapers.make_soup(html, target, mode="auto"), *args)
+
+        baseline = variants["html.parser"]()
+        results[key] = {}
+        for name, func in variants.items():
+            if func() != baseline:
+                print(f"  VAROITUS: {key} / {name} tuottaa eri tuloksen kuin html.parser")
+            results[key][name] = _time(func, rounds)
+    return results
+
+
+def bench_scrapers(directory, rounds):
+    """
+    Palauttaa {avain: {"bytes", "items", "parse_ms", "alloc_kib", "retained_kib", "e2e_ms"}}
+    jokaiselle ravintolalle seka rivin "all" koko fetch_all_restaurants-haulle.
+    """
+    day = bench_day()
+    results = {}
+    with fixture_environment(directory) as (_, pages), fixed_today(day):
+        for key, fetcher in scrapers.FETCHERS.items():
+            if key not in pages:
+                continue
+            parse, args = parser_for(key)
+            target = scrapers.PARSE_TARGETS[parse.__name__]
+            html = pages[key]
+
+            def cold_fetch():
+                with cold_caches():
+                    return fetcher(day)
+
+            result = cold_fetch()
+            peak, retained = _allocations(cold_fetch)
+            results[key] = {
+                "bytes": len(html.encode("utf-8")),
+                "items": len(result["menu"]),
+                "parse_ms": _time(lambda: parse(scrapers.make_soup(html, target), *args), rounds),
+                "alloc_kib": peak,
+                "retained_kib": retained,
+                "e2e_ms": _time(cold_fetch, rounds),
+            }
+
+        def cold_all():
+            with cold_caches():
+                return scrapers.fetch_all_restaurants(day)
+
+        peak, retained = _allocations(cold_all)
+        results["all"] = {
+            "bytes": sum(r["bytes"] for r in results.values()),
+            "items": sum(len(r["menu"]) for r in cold_all()["restaurants"]),
+            "parse_ms": sum(r["parse_ms"] for r in results.values()),
+            "alloc_kib": peak,
+            "retained_kib": retained,
+            "e2e_ms": _time(cold_all, rounds),
+        }
+    return results
+
+
+def bench_models(directory, rounds, copies):
+    """
+    Palauttaa {"dict/json": rivi, "models/orjson": rivi}, jossa "bytes", "dumps_ms",
+    "loads_ms" ja "retained_kib" (copies purettua kopiota muistissa).
+    """
+    day = bench_day()
+    with fixture_environment(directory), fixed_today(day), cold_caches():
+        payload = scrapers.fetch_all_restaurants(day)
+    raw = models.dumps(payload)
+    plain = json.loads(raw)
+    variants = {
+        "dict/json": (plain, lambda: json.dumps(plain, ensure_ascii=False).encode("utf-8"), lambda: json.loads(raw)),
+        "models/orjson": (payload, lambda: models.dumps(payload),
+                          lambda: models.load_payload(models.loads(raw))),
+    }
+    results = {}
+    for name, (data, dumps, loads) in variants.items():
+        kept = []
+        _, retained = _allocations(lambda: kept.extend(loads() for _ in range(copies)))
+        kept.clear()
+        results[name] = {
+            "bytes": len(dumps()),
+            "dumps_ms": _time(dumps, rounds),
+            "loads_ms": _time(loads, rounds),
+            "retained_kib": retained,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance, lower=SCRAPER_METRICS, higher=(), floors=None):
+    """
+    Palauttaa listan heikentymisista: (avain, mittari, perus, nyt). lower ovat
+    mittarit joissa pienempi on parempi (ajat, muisti), higher paivastoin (lapaisy).
+    floors = {mittari: kohinaraja}: lower-mittarin kasvu alle rajan ei ole heikentyminen.
+    """
+    floors = floors or {}
+    regressions = []
+    for key, row in results.items():
+        base_row = baseline.get(key, {})
+        for metric in lower:
+            base = base_row.get(metric)
+            if base and row[metric] > max(base * (1 + tolerance), base + floors.get(metric, 0)):
+                regressions.append((key, metric, base, row[metric]))
+        for metric in higher:
+            base = base_row.get(metric)
+            if base and row[metric] < base / (1 + tolerance):
+                regressions.append((key, metric, base, row[metric]))
+    return regressions
+
+
+def save_and_compare(results, save, baseline, tolerance, lower=SCRAPER_METRICS, higher=(), floors=None):
+    """
+    --save- ja --baseline-valitsimien yhteinen toteutus: tallentaa tulokset ja
+    vertaa niita perustasoon (ks. compare). Palauttaa prosessin virhekoodin.
+    """
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if not baseline:
+        return 0
+    with open(baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), tolerance, lower, higher, floors)
+    for key, metric, base, now in regressions:
+        print(f"HEIKENTYMINEN: {key} {metric} {base:.2f} -> {now:.2f}")
+    return 1 if regressions else 0
+
+
+# ============================================================
+# KUORMITUS
+# ============================================================
+
+def _percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def load(url, concurrency=32, duration=10.0, headers=None):
+    """
+    Ajaa GET-pyyntoja osoitteeseen concurrency saikeella duration sekunnin ajan.
+    Palauttaa {"requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"}.
+    """
+    parts = urlsplit(url)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    headers = {"Accept-Encoding": "gzip", **(headers or {})}
+    deadline = time.perf_counter() + duration
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            samples.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(samples),
+        "errors": errors[0],
+        "rps": len(samples) / elapsed,
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "p99_ms": _percentile(samples, 99) * 1000,
+        "max_ms": max(samples, default=0.0) * 1000,
+    }
+
+
+def _print_table(results, width=10, label="ravintola"):
+    columns = []
+    for row in results.values():
+        for name in row:
+            if name not in columns:
+                columns.append(name)
+    print(f"{label:<{width}}" + "".join(f"{c:>16}" for c in columns))
+    for key, row in results.items():
+        cells = []
+        for c in columns:
+            value = row.get(c)
+            if value is None:
+                cells.append(f"{'-':>16}")
+            elif isinstance(value, float):
+                cells.append(f"{value:>16.2f}")
+            else:
+                cells.append(f"{value:>16}")
+        print(f"{key:<{width}}" + "".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_record = sub.add_parser("record", help="tallenna ravintoloiden sivut verkosta")
+    p_record.add_argument("--fixtures", default=FIXTURES_DIR)
+
+    p_parse = sub.add_parser("parse", help="vertaa parsintatapoja tallennetuilla sivuilla")
+    p_parse.add_argument("--fixtures", default=FIXTURES_DIR)
+    p_parse.add_argument("--rounds", type=int, default=20)
+
+    p_scrapers = sub.add_parser("scrapers", help="mittaa scraperit korvikepalvelinta vasten")
+    p_scrapers.add_argument("--fixtures", default=FIXTURES_DIR)
+    p_scrapers.add_argument("--rounds", type=int, default=10)
+    p_scrapers.add_argument("--save", help="tallenna tulokset JSON-tiedostoon")
+    p_scrapers.add_argument("--baseline", default=os.path.join(BASELINES_DIR, "scrapers.json"),
+                            help="vertaa tallennettuihin tuloksiin (tyhja = ei vertailua)")
+    p_scrapers.add_argument("--tolerance", type=float, default=0.5, help="sallittu hidastuminen (0.5 = 50 %%)")
+
+    p_models = sub.add_parser("models", help="vertaa dict-dataa ja malleja (muisti, sarjallistus)")
+    p_models.add_argument("--fixtures", default=FIXTURES_DIR)
+    p_models.add_argument("--rounds", type=int, default=200)
+    p_models.add_argument("--copies", type=int, default=500)
+
+    p_load = sub.add_parser("load", help="kuormita kaynnissa olevaa palvelinta")
+    p_load.add_argument("url")
+    p_load.add_argument("--concurrency", type=int, default=32)
+    p_load.add_argument("--duration", type=float, default=10.0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        manifest = record(args.fixtures)
+        print(f"Tallennettu {len(manifest)} sivua hakemistoon {args.fixtures}")
+        return 0
+
+    if args.command == "parse":
+        pages = load_fixtures(args.fixtures)
+        if not pages:
+            print(f"Tallennettuja sivuja ei loytynyt hakemistosta {args.fixtures}")
+            return 1
+        _print_table(bench_parse(pages, args.rounds))
+        warn_synthetic(args.fixtures)
+        return 0
+
+    if args.command == "models":
+        _print_table(bench_models(args.fixtures, args.rounds, args.copies), 16, "esitys")
+        warn_synthetic(args.fixtures)
+        return 0
+
+    if args.command == "load":
+        _print_table({urlsplit(args.url).path or "/": load(args.url, args.concurrency, args.duration)}, 24, "reitti")
+        return 0
+
+    results = bench_scrapers(args.fixtures, args.rounds)
+    _print_table(results)
+    warn_synthetic(args.fixtures)
+    return save_and_compare(results, args.save, args.baseline, args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
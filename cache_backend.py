@@ -0,0 +1,201 @@
+"""
+Ruoholahden Lounas - Valimuistin taustajarjestelmat
+Sovellus tallentaa scrapauksen tuloksen avain-arvo-valimuistiin. Oletuksena
+kaytetaan prosessin omaa sanakirjaa; SQLite-tiedostoon perustuva tausta
+jakaa saman tuloksen kaikkien gunicorn-workereiden kesken, jolloin sivustoja
+scrapataan kerran riippumatta workereiden maarasta.
+
+version(key) palauttaa avaimen nykyisen version ilman arvon purkamista, joten
+kutsuja voi pitaa puretun arvon muistissa kunnes se muuttuu. Versio on
+kasvava kokonaisluku (ei aikaleima): jokainen kirjoitus saa uuden arvon,
+vaikka kaksi kirjoitusta osuisi samaan millisekuntiin.
+
+Molemmat tarjoavat myos vanhenevat lukot (acquire/release), joilla vain yksi
+saie tai prosessi kerrallaan paivittaa saman avaimen. acquire poistaa samalla
+kaikki vanhentuneet lukot, joten kertakayttoiset nimet (esim. ajastimen
+prewarm:<paiva>T<aika>) eivat kasaudu.
+
+Valinta ymparistomuuttujilla:
+    LOUNAS_CACHE_BACKEND  - "memory" (oletus) tai "sqlite"
+    LOUNAS_CACHE_PATH     - SQLite-tiedoston polku
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+
+import models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_PATH = os.path.join(".cache", "lounas.sqlite3")
+
+
+class MemoryBackend:
+    """Prosessikohtainen valimuisti. Arvot kopioidaan JSON:n kautta kuten jaetussa taustassa (ks. models.dumps)."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._data = {}
+        self._versions = {}
+        self._counter = 0
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            raw = self._data.get(key)
+        return None if raw is None else models.loads(raw)
+
+    def version(self, key):
+        with self._lock:
+            return self._versions.get(key)
+
+    def set(self, key, value):
+        raw = models.dumps(value)
+        with self._lock:
+            self._counter += 1
+            self._data[key] = raw
+            self._versions[key] = self._counter
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._versions.pop(key, None)
+
+    def acquire(self, name, ttl):
+        """Varaa lukon ttl sekunniksi. Palauttaa omistajatunnisteen tai None jos lukko on varattu."""
+        now = time.time()
+        owner = _owner_token()
+        with self._lock:
+            for expired in [n for n, (_, expires) in self._locks.items() if expires <= now]:
+                del self._locks[expired]
+            if name in self._locks:
+                return None
+            self._locks[name] = (owner, now + ttl)
+        return owner
+
+    def release(self, name, owner):
+        with self._lock:
+            held = self._locks.get(name)
+            if held is not None and held[0] == owner:
+                del self._locks[name]
+
+
+class SQLiteBackend:
+    """Tiedostopohjainen valimuisti jonka kaikki saman koneen prosessit jakavat."""
+
+    name = "sqlite"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " updated REAL NOT NULL DEFAULT (julianday('now')),"
+            " version INTEGER NOT NULL DEFAULT 0"
+            ")"
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(cache)")]
+        if "version" not in columns:
+            # Vanha tiedosto, jossa versio oli updated-aikaleima
+            conn.execute("ALTER TABLE cache ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        # Yhteinen laskuri kaikille avaimille ja prosesseille: poistettu ja
+        # uudelleen kirjoitettu avain ei saa aiempaa versiotaan takaisin
+        conn.execute("CREATE TABLE IF NOT EXISTS sequence (id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO sequence (id, value) VALUES (0, 0)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks ("
+            " name TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires REAL NOT NULL"
+            ")"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else models.loads(row[0])
+
+    def version(self, key):
+        row = self._conn().execute("SELECT version FROM cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key, value):
+        raw = models.dumps(value)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE sequence SET value = value + 1 WHERE id = 0")
+            conn.execute(
+                "INSERT INTO cache (key, value, updated, version)"
+                " VALUES (?, ?, julianday('now'), (SELECT value FROM sequence WHERE id = 0))"
+                " ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated = excluded.updated,"
+                " version = excluded.version",
+                (key, raw),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def acquire(self, name, ttl):
+        """Varaa lukon ttl sekunniksi. Palauttaa omistajatunnisteen tai None jos lukko on varattu."""
+        now = time.time()
+        owner = _owner_token()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM locks WHERE expires <= ?", (now,))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO locks (name, owner, expires) VALUES (?, ?, ?)",
+                (name, owner, now + ttl),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return owner if cur.rowcount == 1 else None
+
+    def release(self, name, owner):
+        self._conn().execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+
+def _owner_token():
+    return f"{os.getpid()}:{threading.get_ident()}:{time.monotonic_ns()}"
+
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+def from_env():
+    """Luo ymparistomuuttujien mukaisen taustan. Tuntematon nimi -> muistivalimuisti."""
+    name = os.environ.get("LOUNAS_CACHE_BACKEND", "memory").strip().lower()
+    if name == "sqlite":
+        return SQLiteBackend(os.environ.get("LOUNAS_CACHE_PATH", DEFAULT_SQLITE_PATH))
+    if name not in BACKENDS:
+        logger.warning(f"Tuntematon valimuistitausta '{name}', kaytetaan muistia")
+    return MemoryBackend()
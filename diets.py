@@ -0,0 +1,146 @@
+"""
+Ruoholahden Lounas - Ruokavaliomerkinnat
+Ruokalajin erityisruokavaliot poimitaan tekstista scrapauksen yhteydessa ja
+tallennetaan ruokalajiin bittijoukkona ("diet": int). Merkinnat tunnistetaan
+lyhenteista (L, G, M, VL, VE) seka suomenkielisista sanoista ("gluteeniton",
+"saatavana vegaanisena", "vahalaktoosinen" ...), joten tulos on sama kaikille
+parsereille riippumatta siita, jattaako sivu merkinnat tekstiin.
+
+Suodatus (?diet=G,VE) on bittioperaatio: ruokalaja kelpaa kun sen bittijoukko
+sisaltaa kaikki pyydetyt bitit.
+
+Suodatin on allergeenisuodatin, joten vaara merkinta on pahempi kuin puuttuva:
+"saatavana vegaanisena" tai "gluteeniton +2 EUR pyydettaessa" tarkoittaa, etta
+ruoka sellaisenaan ei ole sita, joten tilauksesta saatavat vaihtoehdot
+ohitetaan. Lyhenteet hyvaksytaan vain merkintalistana (tekstin lopussa tai
+suluissa, esim. "Lohikeitto L, G" tai "Salaatti (M, VE) ja leipa"), ei
+yksittaisina kirjaimina tekstin keskella ("Kana M-kastike").
+"""
+
+import re
+
+from search import normalize
+
+# Tunnistuksen versio; viikkoindeksi hylkaa eri versiolla merkityt tiedostot
+VERSION = 2
+
+# Jarjestys maaraa bitit: L = 1, G = 2, M = 4, VL = 8, VE = 16
+TAGS = ("L", "G", "M", "VL", "VE")
+BITS = {tag: 1 << i for i, tag in enumerate(TAGS)}
+
+# Maidoton on myos laktoositon ja vegaaninen myos maidoton
+IMPLIES = {
+    BITS["M"]: BITS["L"],
+    BITS["VE"]: BITS["M"] | BITS["L"],
+}
+
+# Suodatusparametrin nimet (pienilla kirjaimilla, ilman diakriitteja)
+ALIASES = {
+    "laktoositon": "L",
+    "gluteeniton": "G",
+    "maidoton": "M",
+    "vahalaktoosinen": "VL",
+    "vegaaninen": "VE",
+    "vegan": "VE",
+}
+
+# Lyhenteet sellaisenaan, isoilla kirjaimilla: merkintalista tekstin lopussa
+# ("Lohikeitto L, G", "Keitto VE.") tai suluissa missa tahansa ("(M, VE)")
+_TAG = r"(?:VL|VE|L|G|M)"
+_TAG_LIST = rf"{_TAG}(?:(?:\s*[,/]\s*|\s+){_TAG})*"
+_MARKER_RES = (
+    re.compile(rf"(?:^|(?<=[\s,]))({_TAG_LIST})\s*[.*]?\s*$"),
+    re.compile(rf"\(\s*({_TAG_LIST})\s*\)"),
+)
+_ABBREVIATION_RE = re.compile(_TAG)
+
+# Tilauksesta saatavat vaihtoehdot: "saatavana gluteenittomana +2EUR",
+# "(saatavilla myos vegaanisena)", "vegan on request", "G pyydettaessa".
+# Poistetaan lauseen osa valimerkkiin asti ennen tunnistusta.
+_ON_REQUEST_RES = (
+    re.compile(r"\b(?:saatavana|saatavilla|available)\b[^,.;()]*", re.IGNORECASE),
+    re.compile(r"[\w-]+\s+(?:on request|pyydett(?:a|ä)ess(?:a|ä)|tilauksesta)\b", re.IGNORECASE),
+)
+
+# Sanat normalisoidusta tekstista: laktoositon / laktoosittomana / laktoositonta ...
+_WORD_RES = (
+    (re.compile(r"\blaktoosit(?:on|tom)"), "L"),
+    (re.compile(r"\bgluteenit(?:on|tom)"), "G"),
+    (re.compile(r"\bmaidot(?:on|tom)"), "M"),
+    (re.compile(r"\bvahalaktoosi"), "VL"),
+    (re.compile(r"\bvega(?:ani|n\b)"), "VE"),
+    (re.compile(r"\blactose.free"), "L"),
+    (re.compile(r"\bgluten.free"), "G"),
+    (re.compile(r"\bdairy.free"), "M"),
+)
+
+
+def _close(bits):
+    for bit, implied in IMPLIES.items():
+        if bits & bit:
+            bits |= implied
+    return bits
+
+
+def _without_on_request(text):
+    for pattern in _ON_REQUEST_RES:
+        text = pattern.sub(" ", text)
+    return text
+
+
+def extract(text):
+    """Tekstin ruokavaliomerkinnat bittijoukkona (tilauksesta saatavia ei lasketa)."""
+    text = _without_on_request(text)
+    bits = 0
+    for pattern in _MARKER_RES:
+        for markers in pattern.findall(text):
+            for tag in _ABBREVIATION_RE.findall(markers):
+                bits |= BITS[tag]
+    normalized = normalize(text)
+    for pattern, tag in _WORD_RES:
+        if pattern.search(normalized):
+            bits |= BITS[tag]
+    return _close(bits)
+
+
+def tag(items):
+    """Lisaa ruokalajeihin "diet"-bittijoukon, jos parseri ei ole sita jo asettanut."""
+    for item in items:
+        if "diet" not in item:
+            item["diet"] = extract(item["food"])
+    return items
+
+
+def tags(bits):
+    """Bittijoukko lyhenteiksi: 3 -> ["L", "G"]."""
+    return [tag for tag in TAGS if bits & BITS[tag]]
+
+
+def parse(value):
+    """
+    Suodatusparametri ("G,VE", "gluteeniton") bittijoukoksi. Tyhja arvo = 0,
+    tuntematon merkinta = None.
+    """
+    bits = 0
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        tag = part.upper() if part.upper() in BITS else ALIASES.get(normalize(part))
+        if tag is None:
+            return None
+        bits |= BITS[tag]
+    return bits
+
+
+def filter_payload(data, bits):
+    """
+    Sivun / API:n data vain ruokalajeilla, joissa on kaikki pyydetyt merkinnat.
+    Ravintolat joilla ei ole yhtaan sopivaa ruokalajia jaavat pois.
+    """
+    restaurants = []
+    for restaurant in data.get("restaurants", []):
+        menu = [item for item in restaurant["menu"] if item.get("diet", 0) & bits == bits]
+        if menu:
+            restaurants.append({**restaurant, "menu": menu})
+    return {**data, "restaurants": restaurants, "diet": tags(bits)}
@@ -0,0 +1,257 @@
+"""
+Ruoholahden Lounas - Staattinen vienti
+Scrapaa paivan lounaslistat kerran ja kirjoittaa sivut seka API:n JSONin
+staattisiksi tiedostoiksi, joita mika tahansa staattinen palvelin tai CDN voi
+tarjoilla ilman sovellusta:
+
+    python -m export [--root public] [--keep 3] [--force] [--serve 8080]
+    python -m scrapers export ...
+
+Hakemistorakenne (URL oikealla):
+
+    public/current -> releases/20261016T101500-3cee0dca62   (symlinkki)
+    public/releases/<versio>/index.html                     /
+                             <sijainti>/index.html          /<sijainti>
+                             api/restaurants.json           /api/restaurants
+                             api/<sijainti>/restaurants.json
+                             api/locations.json
+                             version.json                   versio, paiva ja sukupolvet
+
+Jokaisen tiedoston vieressa on valmiiksi pakattu .gz (ja .br, jos brotli on
+asennettu) nginxin gzip_static- ja brotli_static-asetuksia varten. Versio
+kootaan uuteen hakemistoon ja current-linkki vaihdetaan os.replacella, joten
+palvelin nakee aina joko vanhan tai uuden version kokonaisena. Jos tiedostot
+eivat ole muuttuneet (hakuaikaa lukuun ottamatta), uutta versiota ei tehda.
+Vanhat versiot poistetaan (--keep uusinta sailytetaan).
+
+    root /srv/lounas/public/current;
+    gzip_static on;
+    location / { try_files $uri $uri.json $uri/index.html =404; }
+
+Vienti ajetaan ajastimesta (cron tai scheduler.py, kun LOUNAS_EXPORT_DIR on
+asetettu). Dynaamiset ominaisuudet (paivitys, ruokahaku, historia,
+live-paivitykset) jaavat Flask-sovellukselle. --serve tarjoilee viedyn
+version paikallisesti samalla reitityksella esikatselua ja mittauksia varten
+(ks. loadtest.py --scenario static).
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import render_template
+from werkzeug.http import parse_accept_header
+
+import app as web
+import models
+from scrapers import FINLAND_TZ, LOCATIONS, DEFAULT_LOCATION
+
+EXPORT_DIR = os.environ.get("LOUNAS_EXPORT_DIR", "")
+KEEP_RELEASES = 3
+CURRENT = "current"
+RELEASES = "releases"
+
+# Pakkaus (ks. app._build_variants) -> tiedostopaate
+SUFFIXES = {"identity": "", "gzip": ".gz", "br": ".br"}
+
+# Datan kentat jotka muuttuvat jokaisella haulla, vaikka menut pysyisivat samoina.
+# Ne eivat vaikuta version tiivisteeseen (sukupolvi on vain version.jsonissa).
+VOLATILE_FIELDS = ("fetch_time",)
+
+
+# ============================================================
+# RENDEROINTI
+# ============================================================
+
+def site_files(entries):
+    """Sijaintien valimuistimerkinnoista {suhteellinen polku: tavut}."""
+    files = {}
+    with web.app.app_context():
+        for location, entry in entries.items():
+            data = entry["data"]
+            # Ilman sukupolvea sivu ei avaa live-paivitysten striimia
+            page = render_template("index.html", data=data, static=True).encode("utf-8")
+            api = web._render_json(data)
+            if location == DEFAULT_LOCATION:
+                files["index.html"] = page
+                files["api/restaurants.json"] = api
+            files[f"{location}/index.html"] = page
+            files[f"api/{location}/restaurants.json"] = api
+    files["api/locations.json"] = models.dumps(web.locations_payload())
+    return files
+
+
+def content_digest(entries):
+    """
+    Version tiiviste: sivut renderoidaan ilman VOLATILE_FIELDS-kenttia, joten
+    tiiviste muuttuu vain kun menut, sivupohja tai sijainnit muuttuvat.
+    """
+    stable = {location: dict(entry, data={k: v for k, v in entry["data"].items() if k not in VOLATILE_FIELDS})
+              for location, entry in entries.items()}
+    return _digest(site_files(stable))
+
+
+def _digest(files):
+    h = hashlib.sha1()
+    for path in sorted(files):
+        h.update(path.encode("utf-8") + b"\0" + files[path] + b"\0")
+    return h.hexdigest()[:10]
+
+
+# ============================================================
+# VERSIOT
+# ============================================================
+
+def current_version(root):
+    """Aktiivisen version nimi tai None."""
+    try:
+        return os.path.basename(os.readlink(os.path.join(root, CURRENT)))
+    except OSError:
+        return None
+
+
+def write_release(root, version, files):
+    """Kirjoittaa version pakattuine rinnakkaistiedostoineen. Palauttaa hakemiston."""
+    final = os.path.join(root, RELEASES, version)
+    tmp = final + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    for path, body in files.items():
+        target = os.path.join(tmp, *path.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        for encoding, variant in web._build_variants(body).items():
+            with open(target + SUFFIXES[encoding], "wb") as f:
+                f.write(variant)
+    os.rename(tmp, final)
+    return final
+
+
+def activate(root, version):
+    """Vaihtaa current-linkin osoittamaan versioon (atominen os.replace)."""
+    link = os.path.join(root, CURRENT)
+    tmp = f"{link}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    os.symlink(os.path.join(RELEASES, version), tmp, target_is_directory=True)
+    os.replace(tmp, link)
+
+
+def prune(root, keep=KEEP_RELEASES):
+    """Poistaa vanhimmat versiot; aktiivinen versio sailyy aina."""
+    releases = os.path.join(root, RELEASES)
+    active = current_version(root)
+    paths = sorted((os.path.join(releases, name) for name in os.listdir(releases)), key=os.path.getmtime)
+    for path in paths[:max(len(paths) - keep, 0)]:
+        if os.path.basename(path) != active:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def export(root, force=False, keep=KEEP_RELEASES):
+    """
+    Scrapaa (valimuistin kautta, force = hae kaikki uudelleen) ja vie sivuston
+    rootiin. Palauttaa (versio, uusi); uusi on False jos aktiivinen versio on jo sama.
+    """
+    entries = web._refresh_entries(force, list(LOCATIONS))
+    digest = content_digest(entries)
+    active = current_version(root)
+    if active is not None and active.endswith("-" + digest):
+        return active, False
+
+    files = site_files(entries)
+
+    now = datetime.now(FINLAND_TZ)
+    version = f"{now:%Y%m%dT%H%M%S}-{digest}"
+    files["version.json"] = models.dumps({
+        "version": version,
+        "date": entries[DEFAULT_LOCATION]["date"],
+        "exported": now.isoformat(timespec="seconds"),
+        "generations": {location: entry["generation"] for location, entry in entries.items()},
+    })
+    write_release(root, version, files)
+    activate(root, version)
+    prune(root, keep)
+    return version, True
+
+
+# ============================================================
+# ESIKATSELUPALVELIN
+# ============================================================
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    """Tarjoilee viedyn version kuten nginx-esimerkki: try_files ja valmiiksi pakatut tiedostot."""
+
+    protocol_version = "HTTP/1.1"
+    # Otsakkeet ja runko lahtevat eri kirjoituksina; ilman TCP_NODELAYta
+    # keep-alive-yhteys jaa odottamaan viivastettya kuittausta (~40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        for candidate in (path, path + ".json", os.path.join(path, "index.html")):
+            if os.path.isfile(candidate):
+                break
+        else:
+            self.send_error(404)
+            return None
+
+        mimetype = self.guess_type(candidate)
+        accept = parse_accept_header(self.headers.get("Accept-Encoding", ""))
+        encoding = "identity"
+        for option in ("br", "gzip"):
+            if accept[option] and os.path.isfile(candidate + SUFFIXES[option]):
+                encoding = option
+                break
+        f = open(candidate + SUFFIXES[encoding], "rb")
+        self.send_response(200)
+        self.send_header("Content-Type", mimetype)
+        self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+        self.send_header("Cache-Control", web.CACHE_CONTROL)
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        return f
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+def serve(root, port=8080, host="127.0.0.1"):
+    """Kaynnistaa palvelimen taustasaikeeseen. current-linkki luetaan joka pyynnolla."""
+    handler = partial(StaticHandler, directory=os.path.join(root, CURRENT))
+    server = _Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="export-server", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m export", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", default=EXPORT_DIR or "public")
+    parser.add_argument("--keep", type=int, default=KEEP_RELEASES, help="sailytettavien versioiden maara")
+    parser.add_argument("--force", action="store_true", help="hae kaikki ravintolat uudelleen")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="tarjoile viety versio paikallisesti")
+    args = parser.parse_args(argv)
+
+    version, created = export(args.root, args.force, args.keep)
+    print(f"{'Uusi versio' if created else 'Ei muutoksia'}: {os.path.join(args.root, RELEASES, version)}")
+    if args.serve:
+        server = serve(args.root, args.serve)
+        print(f"   Avaa selaimessa: http://localhost:{args.serve}\n")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Ruoholahden Lounas - Menuhistoria
+Jokaisen onnistuneen scrapauksen menut tallennetaan paivakohtaisesti
+SQLite-tietokantaan, josta historiakyselyt vastataan koskematta ravintoloiden
+sivuihin.
+
+Taulun paaavain (day, restaurant, position) palvelee paiva- ja viikkokyselyja
+(paivamaaravali) ja indeksi (restaurant, day) ravintolakohtaisia hakuja uusimmasta
+vanhimpaan, joten kyselyt pysyvat nopeina vuosienkin historialla.
+
+    LOUNAS_HISTORY_PATH  - tietokannan polku (tyhja = historia pois paalta)
+"""
+
+import os
+import sqlite3
+import threading
+import logging
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(".cache", "history.sqlite3")
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS menu_items ("
+    " day TEXT NOT NULL,"
+    " restaurant TEXT NOT NULL,"
+    " position INTEGER NOT NULL,"
+    " name TEXT NOT NULL,"
+    " food TEXT NOT NULL,"
+    " food_norm TEXT NOT NULL,"
+    " price TEXT NOT NULL,"
+    " PRIMARY KEY (day, restaurant, position)"
+    ") WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_menu_items_restaurant_day ON menu_items (restaurant, day)",
+)
+
+
+def _like_pattern(text):
+    escaped = text.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class HistoryStore:
+    """Paivakohtaiset menut SQLite-tietokannassa."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, day, restaurant, result):
+        """Korvaa ravintolan (avain) menun paivalle day scrapauksen tuloksella."""
+        rows = [
+            (day.isoformat(), restaurant, position, result["name"], item["food"],
+             item["food"].lower(), item.get("price", ""))
+            for position, item in enumerate(result["menu"])
+        ]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM menu_items WHERE day = ? AND restaurant = ?",
+                         (day.isoformat(), restaurant))
+            conn.executemany(
+                "INSERT INTO menu_items (day, restaurant, position, name, food, food_norm, price)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _restaurants(self, rows):
+        """Ryhmittelee rivit (day, restaurant, name, food, price) {paiva: [ravintola]} -muotoon."""
+        days = {}
+        for day, restaurant, name, food, price in rows:
+            restaurants = days.setdefault(day, [])
+            if not restaurants or restaurants[-1]["key"] != restaurant:
+                restaurants.append({"key": restaurant, "name": name, "menu": []})
+            restaurants[-1]["menu"].append({"food": food, "price": price})
+        return days
+
+    def between(self, start, end):
+        """Menut paivilta start..end (molemmat mukaan): {"YYYY-MM-DD": [ravintolat]}."""
+        rows = self._conn().execute(
+            "SELECT day, restaurant, name, food, price FROM menu_items"
+            " WHERE day BETWEEN ? AND ? ORDER BY day, restaurant, position",
+            (start.isoformat(), end.isoformat()),
+        ).fetchall()
+        return self._restaurants(rows)
+
+    def on_day(self, day):
+        return self.between(day, day).get(day.isoformat(), [])
+
+    def week(self, day):
+        """Paivan day ISO-viikon menut maanantaista sunnuntaihin."""
+        monday = day - timedelta(days=day.weekday())
+        return self.between(monday, monday + timedelta(days=6))
+
+    def last_served(self, text, restaurant=None):
+        """Viimeisin paiva jolloin ruoka sisalsi tekstin text: {"date", "restaurant", "name", "food"} tai None."""
+        sql = ("SELECT day, restaurant, name, food FROM menu_items"
+               " WHERE food_norm LIKE ? ESCAPE '\\'")
+        params = [_like_pattern(text)]
+        if restaurant:
+            sql += " AND restaurant = ?"
+            params.append(restaurant)
+        sql += " ORDER BY day DESC LIMIT 1"
+        row = self._conn().execute(sql, params).fetchone()
+        if row is None:
+            return None
+        return {"date": row[0], "restaurant": row[1], "name": row[2], "food": row[3]}
+
+
+def from_env():
+    """Luo historian LOUNAS_HISTORY_PATH-polkuun, tai palauttaa None jos polku on tyhja."""
+    path = os.environ.get("LOUNAS_HISTORY_PATH", DEFAULT_PATH)
+    if not path:
+        return None
+    try:
+        return HistoryStore(path)
+    except sqlite3.Error as e:
+        logger.warning(f"Menuhistoriaa ei voitu avata ({path}): {e}")
+        return None
@@ -0,0 +1,233 @@
+"""
+Ruoholahden Lounas - HTTP-kerros
+Jaettu requests.Session kaikille scrapereille: yhteyspoolit (keep-alive),
+hostikohtaiset rinnakkaisuusrajat, uudelleenyritys backoffilla ohimeneviin
+virheisiin seka hostikohtaiset laskurit yhteyksien uudelleenkaytosta.
+
+Asetukset luetaan ymparistomuuttujista:
+    LOUNAS_HTTP_POOL_HOSTS    - montako hostikohtaista poolia pidetaan auki
+    LOUNAS_HTTP_POOL_MAXSIZE  - yhteyksia per host -pooli
+    LOUNAS_HTTP_PER_HOST      - samanaikaisia pyyntoja per host
+    LOUNAS_HTTP_RETRIES       - uudelleenyritysten maara
+    LOUNAS_HTTP_BACKOFF       - backoff-kerroin sekunteina
+    LOUNAS_HTTP_CACHE_DIR     - levyvalimuistin hakemisto (tyhja = pois paalta)
+
+Levyvalimuisti tallentaa vastauksen rungon seka ETag/Last-Modified-tiedot ja
+lahettaa ne seuraavalla kerralla If-None-Match/If-Modified-Since-otsakkeina.
+304-vastaus palautetaan tallennetulla rungolla, joten muuttumaton sivu maksaa
+vain yhden pienen pyynnon.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+POOL_HOSTS = int(os.environ.get("LOUNAS_HTTP_POOL_HOSTS", "10"))
+POOL_MAXSIZE = int(os.environ.get("LOUNAS_HTTP_POOL_MAXSIZE", "4"))
+PER_HOST_LIMIT = int(os.environ.get("LOUNAS_HTTP_PER_HOST", "2"))
+RETRIES = int(os.environ.get("LOUNAS_HTTP_RETRIES", "2"))
+BACKOFF_FACTOR = float(os.environ.get("LOUNAS_HTTP_BACKOFF", "0.5"))
+
+CACHE_DIR = os.environ.get("LOUNAS_HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+
+# Ohimenevat virheet joihin yritetaan uudelleen
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_host_limits = {}
+_host_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _build_session():
+    # requests (ja urllib3) ladataan vasta ensimmaisessa haussa: valimuistista
+    # palveleva web-workeri ei tarvitse niita lainkaan
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        status=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+        pool_block=False,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Palauttaa prosessin jaetun sessionin (luodaan ensimmaisella kutsulla)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _host_semaphore(host):
+    with _stats_lock:
+        sem = _host_limits.get(host)
+        if sem is None:
+            sem = threading.BoundedSemaphore(PER_HOST_LIMIT)
+            _host_limits[host] = sem
+            _host_stats[host] = {"requests": 0, "errors": 0, "not_modified": 0}
+        return sem
+
+
+def _count(host, key):
+    with _stats_lock:
+        _host_stats[host][key] += 1
+
+
+def _cache_paths(url):
+    name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, name + ".json"), os.path.join(CACHE_DIR, name + ".body")
+
+
+def _load_cached(url):
+    if not CACHE_DIR:
+        return None, None
+    meta_path, body_path = _cache_paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None, None
+    if meta.get("url") != url:
+        return None, None
+    return meta, body
+
+
+def _store_cached(url, resp):
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if not CACHE_DIR or not (etag or last_modified):
+        return
+    meta = {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "encoding": resp.encoding,
+        "content_type": resp.headers.get("Content-Type"),
+    }
+    meta_path, body_path = _cache_paths(url)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Runko ensin, metatiedot viimeisena - valmis metatiedosto tarkoittaa ehjaa paria
+        for path, data, mode in ((body_path, resp.content, "wb"),
+                                 (meta_path, json.dumps(meta), "w")):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, mode) as f:
+                f.write(data)
+            os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"HTTP-valimuistiin kirjoitus epaonnistui ({url}): {e}")
+
+
+def _from_cache(url, meta, body):
+    import requests
+
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = url
+    resp._content = body
+    resp.encoding = meta.get("encoding")
+    if meta.get("content_type"):
+        resp.headers["Content-Type"] = meta["content_type"]
+    return resp
+
+
+def get(url, headers=None, timeout=15):
+    """
+    GET-pyynto jaetun sessionin kautta.
+
+    Rajoittaa samanaikaiset pyynnot samaan hostiin PER_HOST_LIMIT:iin ja
+    kayttaa levyvalimuistia ehdollisiin pyyntoihin. Palautetulla vastauksella
+    on lisaksi attribuutit from_cache (304 -> tallennettu runko) ja
+    cache_digest (rungon tiiviste, jolla parsinnan tulos voidaan kayttaa uudelleen).
+    Heittaa poikkeuksen virheista samoin kuin requests.get + raise_for_status.
+    """
+    host = urlsplit(url).netloc
+    sem = _host_semaphore(host)
+
+    meta, body = _load_cached(url)
+    headers = dict(headers or {})
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    with sem:
+        _count(host, "requests")
+        try:
+            resp = get_session().get(url, headers=headers, timeout=timeout)
+            resp.raise_for_status()
+        except Exception:
+            _count(host, "errors")
+            raise
+
+    if resp.status_code == 304 and meta:
+        _count(host, "not_modified")
+        resp = _from_cache(url, meta, body)
+        resp.from_cache = True
+    else:
+        _store_cached(url, resp)
+        resp.from_cache = False
+    resp.cache_digest = hashlib.sha1(resp.content).hexdigest()
+    return resp
+
+
+def host_stats():
+    """
+    Palauttaa hostikohtaiset laskurit:
+    {host: {"requests", "errors", "not_modified", "connections", "reused"}}
+
+    "connections" on poolin avaamien TCP/TLS-yhteyksien maara ja "reused"
+    niiden pyyntojen maara jotka kulkivat jo avatun yhteyden yli.
+    """
+    with _stats_lock:
+        stats = {host: dict(values) for host, values in _host_stats.items()}
+
+    pool_counts = {}
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = getattr(adapter, "poolmanager", None)
+            if pools is None:
+                continue
+            for key in list(pools.pools.keys()):
+                pool = pools.pools.get(key)
+                if pool is None:
+                    continue
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                counts = pool_counts.setdefault(host, {"connections": 0, "pool_requests": 0})
+                counts["connections"] += pool.num_connections
+                counts["pool_requests"] += pool.num_requests
+
+    for host, values in stats.items():
+        counts = pool_counts.get(host, {"connections": 0, "pool_requests": 0})
+        values["connections"] = counts["connections"]
+        values["reused"] = max(0, counts["pool_requests"] - counts["connections"])
+    return stats
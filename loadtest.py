@@ -0,0 +1,246 @@
+"""
+Ruoholahden Lounas - Kuormitustestit
+Ajaa web-sovellusta paikallisesti tallennettuja ravintolasivuja vasten (ks.
+bench.py record) ja mittaa lapaisyn seka viiveen persentiilit.
+
+    python -m loadtest [--fixtures fixtures] [--scenario hot cold slow static] [--duration 5]
+                       [--concurrency 16] [--save tulos.json] [--baseline baselines/loadtest.json]
+
+Skenaariot:
+  hot   valimuisti on lammin; jatkuva kuorma --duration sekuntia reittia kohden
+  cold  valimuistit tyhjennetaan ja --concurrency pyyntoa osuu niihin yhta aikaa
+        (ryntays); toistetaan --rounds kertaa
+  slow  kuten cold, mutta korvikepalvelin vastaa --latency sekunnin viiveella ja
+        palauttaa 503-virheen --failure-rate osuudella pyynnoista
+  static  sivusto viedaan staattisiksi tiedostoiksi (ks. export.py), jotka
+        tarjoillaan ilman sovellusta; vertailukohta hot-skenaarion Flask-reiteille
+
+Reitit ovat /, /api/restaurants ja /refresh (static ohittaa /refreshin). Sarake upstream kertoo montako
+ravintolasivun hakua yksi valimuistin taytto aiheutti (ryntayssuojaus: ei kasva
+samanaikaisten pyyntojen mukana). Tulosta verrataan perustasoon
+baselines/loadtest.json (--baseline, tyhja = ei vertailua), ja virhekoodi
+palautetaan, jos p50/p95/p99 tai upstream on kasvanut tai lapaisy laskenut yli
+--tolerance-rajan (ks. bench.save_and_compare). Perustaso on mitattu
+oletusasetuksilla yhdella prosessorilla; uusi tallennetaan --save-valitsimella.
+
+Paiva kiinnitetaan bench.fixed_today-funktiolla koko pinolle (scraperit ja
+sovelluksen pyyntopolku), joten luvut ovat samat myos viikonloppuna ajettuna.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+# Sovellus ajetaan eristettyna: muistivalimuisti, ei historiaa, levyvalimuisteja, vedosta eika ajastinta
+os.environ.update({
+    "LOUNAS_CACHE_BACKEND": "memory",
+    "LOUNAS_HISTORY_PATH": "",
+    "LOUNAS_HTTP_CACHE_DIR": "",
+    "LOUNAS_WEEK_INDEX_DIR": "",
+    "LOUNAS_SCHEDULER": "0",
+    "LOUNAS_SNAPSHOT_PATH": "",
+})
+
+from werkzeug.serving import make_server
+
+import bench
+import cache_backend
+
+ROUTES = ("/", "/api/restaurants", "/refresh")
+SCENARIOS = ("hot", "cold", "slow", "static")
+# Suuremmat arvot ovat huonompia (upstream = ryntayssuojaus), paitsi lapaisy (rps)
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms", "upstream")
+# Lyhyiden rivien (esim. cold /refresh, jossa pyynnot odottavat tyon luontilukkoa
+# 50 ms valein) luvut heiluvat ajosta toiseen: p50 kymmenia ja 80 naytteen
+# p95/p99 satoja millisekunteja. Tata pienempi kasvu ei ole heikentyminen.
+LATENCY_FLOORS = {"p50_ms": 50.0, "p95_ms": 150.0, "p99_ms": 150.0}
+
+
+# ============================================================
+# PALVELIN
+# ============================================================
+
+def start_app():
+    """Kaynnistaa sovelluksen monisaikeisella WSGI-palvelimella. Palauttaa (web, palvelin, osoite)."""
+    import app as web
+
+    # Pyyntolokit ja slow-skenaarion odotetut hakuvirheet peittaisivat tulokset
+    for name in ("werkzeug", "app", "scrapers", "http_client"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="loadtest-server", daemon=True).start()
+    return web, server, f"http://127.0.0.1:{server.server_port}"
+
+
+def reset_app(web):
+    """Tyhjentaa sovelluksen ja scrapereiden valimuistit (kylma kaynnistys)."""
+    web._cache = cache_backend.MemoryBackend()
+    web._entry_memo.clear()
+    web._rendered.clear()
+    web._live_seen.clear()
+    web._live_events.clear()
+    bench.scrapers._week_index.clear()
+    bench.scrapers._pages.clear()
+    bench.scrapers._parse_memo.clear()
+
+
+def drain_refresh(web, timeout=60):
+    """Odottaa kaynnissa olevan paivitystyon loppuun, ettei se valu seuraavaan skenaarioon."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        current = web._cache.get(web.REFRESH_JOB_CURRENT)
+        job = web.get_refresh_job(current["id"]) if current else None
+        if job is None or job["status"] not in ("queued", "running"):
+            return
+        time.sleep(0.1)
+
+
+# ============================================================
+# KUORMA
+# ============================================================
+
+def burst(url, concurrency):
+    """Lahettaa concurrency pyyntoa samanaikaisesti. Palauttaa (viiveet sekunteina, virheet)."""
+    parts = urlsplit(url)
+    barrier = threading.Barrier(concurrency)
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        conn.connect()
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            conn.request("GET", parts.path or "/", headers={"Accept-Encoding": "gzip"})
+            resp = conn.getresponse()
+            resp.read()
+            failed = resp.status >= 400
+        except (OSError, http.client.HTTPException):
+            failed = True
+        elapsed = time.perf_counter() - start
+        conn.close()
+        with lock:
+            samples.append(elapsed)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, errors[0]
+
+
+def _summary(samples, errors, elapsed):
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": bench._percentile(samples, 50) * 1000,
+        "p95_ms": bench._percentile(samples, 95) * 1000,
+        "p99_ms": bench._percentile(samples, 99) * 1000,
+        "max_ms": max(samples, default=0.0) * 1000,
+    }
+
+
+def run_static(web, args):
+    """Vie sivuston valiaikaiseen hakemistoon ja kuormittaa sen staattista palvelinta."""
+    import export
+
+    results = {}
+    reset_app(web)
+    with tempfile.TemporaryDirectory() as root:
+        export.export(root, force=True)
+        server = export.serve(root, port=0)
+        try:
+            for route in args.routes:
+                if route == "/refresh":
+                    continue
+                row = bench.load(f"http://127.0.0.1:{server.server_port}{route}", args.concurrency, args.duration)
+                row["upstream"] = 0
+                results[f"static {route}"] = row
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def run_scenario(scenario, web, base_url, fixture_server, args):
+    """Palauttaa {"<skenaario> <reitti>": tulosrivi} jokaiselle reitille."""
+    if scenario == "static":
+        return run_static(web, args)
+    results = {}
+    fixture_server.latency = args.latency if scenario == "slow" else 0.0
+    fixture_server.failure_rate = args.failure_rate if scenario == "slow" else 0.0
+    for route in args.routes:
+        reset_app(web)
+        if scenario == "hot":
+            web.refresh_all_locations(force=True)
+            hits = fixture_server.hits
+            row = bench.load(base_url + route, args.concurrency, args.duration)
+            upstream = fixture_server.hits - hits
+        else:
+            samples, errors, upstream = [], 0, 0
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                drain_refresh(web)
+                reset_app(web)
+                hits = fixture_server.hits
+                round_samples, round_errors = burst(base_url + route, args.concurrency)
+                drain_refresh(web)
+                samples += round_samples
+                errors += round_errors
+                upstream += fixture_server.hits - hits
+            row = _summary(samples, errors, time.perf_counter() - started)
+            upstream /= args.rounds
+        drain_refresh(web)
+        row["upstream"] = upstream
+        results[f"{scenario} {route}"] = row
+    return results
+
+
+def run(args):
+    web, server, base_url = start_app()
+    results = {}
+    try:
+        with bench.fixture_environment(args.fixtures) as (fixture_server, _), bench.fixed_today(bench.bench_day()):
+            for scenario in args.scenario:
+                results.update(run_scenario(scenario, web, base_url, fixture_server, args))
+    finally:
+        server.shutdown()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=bench.FIXTURES_DIR)
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--routes", nargs="+", default=list(ROUTES))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="hot-skenaarion kesto reittia kohden (s)")
+    parser.add_argument("--rounds", type=int, default=5, help="cold- ja slow-skenaarion ryntayskierrokset")
+    parser.add_argument("--latency", type=float, default=0.5, help="slow: korvikepalvelimen viive (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="slow: 503-virheiden osuus")
+    parser.add_argument("--save", help="tallenna tulokset JSON-tiedostoon")
+    parser.add_argument("--baseline", default=os.path.join(bench.BASELINES_DIR, "loadtest.json"),
+                        help="vertaa tallennettuihin tuloksiin (tyhja = ei vertailua)")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="sallittu heikentyminen (0.5 = 50 %%)")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    bench._print_table(results, 24, "skenaario")
+    bench.warn_synthetic(args.fixtures)
+    return bench.save_and_compare(results, args.save, args.baseline, args.tolerance,
+                                  lower=LATENCY_METRICS, higher=("rps",), floors=LATENCY_FLOORS)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
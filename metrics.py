@@ -0,0 +1,202 @@
+"""
+Ruoholahden Lounas - Mittarit
+Kevyet laskurit, mittarit ja histogrammit seka niiden esitys Prometheuksen
+tekstimuodossa (/metrics). Arvot ovat prosessikohtaisia: useamman gunicorn-
+workerin kanssa Prometheus nakee sen workerin luvut joka vastasi pyyntoon,
+joten koosteet kannattaa laskea kyselyssa (sum/rate).
+"""
+
+import math
+import threading
+
+import http_client
+
+# Oletusvalit sekunteina: pyynnot ja parsinta millisekunneista, haut kymmeniin sekunteihin
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+_lock = threading.Lock()
+
+
+def _label_key(names, labels):
+    if set(labels) != set(names):
+        raise ValueError(f"Odotettiin nimikkeet {names}, saatiin {tuple(labels)}")
+    return tuple(str(labels[name]) for name in names)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Kasvava laskuri."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labels, labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labels, labels), 0)
+
+    def render(self):
+        lines = self._header()
+        with _lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Viimeisin arvo (esim. loydettyjen ruokien maara)."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.labels, labels)
+        with _lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Jakauma kumulatiivisina valeina (le) seka summa ja lukumaara."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labels, labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(_label_key(self.labels, labels))
+        return state[2] if state else 0
+
+    def render(self):
+        lines = self._header()
+        with _lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Collected(_Metric):
+    """
+    Mittari jonka arvot luetaan funktiosta vasta esitettaessa, kun laskurit
+    pidetaan muualla (esim. http_client.host_stats). collect palauttaa
+    {nimikearvojen tuple: arvo}.
+    """
+
+    def __init__(self, name, help, labels, collect, kind="gauge"):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def render(self):
+        lines = self._header()
+        for key, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+def render():
+    """Kaikki mittarit Prometheuksen tekstimuodossa (text/plain; version=0.0.4)."""
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================
+# SOVELLUKSEN MITTARIT
+# ============================================================
+
+RESTAURANT_FETCH_SECONDS = Histogram(
+    "lounas_restaurant_fetch_seconds", "Ravintolan haun kesto (viikkoindeksi, haku ja parsinta).", ["restaurant"])
+RESTAURANT_ITEMS = Gauge(
+    "lounas_restaurant_items", "Viimeisimmassa haussa loydetyt ruokalajit.", ["restaurant"])
+RESTAURANT_FAILURES = Counter(
+    "lounas_restaurant_failures_total", "Epaonnistuneet ravintolahaut.", ["restaurant"])
+PAGE_BYTES = Counter(
+    "lounas_page_bytes_total", "Ladatut sivut tavuina (kirjataan sivun hakeneelle ravintolalle).", ["restaurant"])
+PAGE_FETCHES = Counter(
+    "lounas_page_fetches_total", "Sivujen haut tuloksen mukaan (ok, not_modified, error).", ["restaurant", "result"])
+PARSE_SECONDS = Histogram(
+    "lounas_parse_seconds", "Sivun parsinnan kesto.", ["restaurant"])
+CACHE_LOOKUPS = Counter(
+    "lounas_cache_lookups_total", "Paivan valimuistin kaytto (hit, stale, miss).", ["location", "result"])
+REQUEST_SECONDS = Histogram(
+    "lounas_request_seconds", "HTTP-pyyntojen kesto reitin mukaan.", ["route", "method", "status"])
+
+
+def _host_counter(field):
+    return lambda: {(host,): values[field] for host, values in http_client.host_stats().items()}
+
+
+HTTP_HOST_REQUESTS = Collected(
+    "lounas_http_host_requests_total", "HTTP-pyynnot hostia kohden.", ["host"],
+    _host_counter("requests"), kind="counter")
+HTTP_HOST_ERRORS = Collected(
+    "lounas_http_host_errors_total", "Epaonnistuneet HTTP-pyynnot hostia kohden.", ["host"],
+    _host_counter("errors"), kind="counter")
+HTTP_HOST_NOT_MODIFIED = Collected(
+    "lounas_http_host_not_modified_total", "304-vastaukset (levyvalimuistin runko) hostia kohden.", ["host"],
+    _host_counter("not_modified"), kind="counter")
+HTTP_HOST_CONNECTIONS = Collected(
+    "lounas_http_host_connections_total", "Poolin avaamat TCP/TLS-yhteydet hostia kohden.", ["host"],
+    _host_counter("connections"), kind="counter")
+HTTP_HOST_REUSED = Collected(
+    "lounas_http_host_reused_total", "Jo avatun yhteyden yli kulkeneet pyynnot hostia kohden.", ["host"],
+    _host_counter("reused"), kind="counter")
@@ -0,0 +1,171 @@
+"""
+Ruoholahden Lounas - Tietomalli
+Ravintolan tulos ja ruokalajit kevyina __slots__-olioina. Ravintolan
+staattinen metatieto (nimi, osoite, lahde, linkki, aukiolo, hinnat) on oma
+jaettu olionsa, joka luodaan kerran ja jaetaan kaikkien tulosten kesken.
+
+Oliot kayttaytyvat kuin lukukelpoiset dictit (result["menu"],
+item.get("diet", 0)), joten sivupohja, historia, haku ja valimuistista
+puretut dictit kayvat samoille funktioille. Sarjallistus (valimuisti, jaettu
+tausta, API) tehdaan orjsonilla, jos se on asennettu.
+"""
+
+import sys
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass, asdict, is_dataclass
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _Record(Mapping):
+    """Dict-yhteensopiva lukunakyma __slots__-kenttiin."""
+
+    __slots__ = ()
+
+    # Avaimet jarjestyksessa; aliluokka maarittelee (tai laskee propertyna)
+    _KEYS = ()
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self._KEYS}
+
+
+@dataclass(frozen=True, slots=True)
+class RestaurantInfo:
+    name: str
+    address: str
+    source: str
+    url: str
+    hours: str = ""
+    price_info: str = ""
+
+
+_infos = {}
+
+
+def restaurant_info(name, address, source, url, hours="", price_info=""):
+    """Palauttaa jaetun metatieto-olion; samat kentat = sama olio."""
+    fields = (name, address, source, url, hours, price_info)
+    info = _infos.get(fields)
+    if info is None:
+        info = _infos.setdefault(fields, RestaurantInfo(*(sys.intern(f or "") for f in fields)))
+    return info
+
+
+@dataclass(slots=True, eq=False)
+class MenuItem(_Record):
+    food: str
+    price: str = ""
+    diet: int = 0
+
+    _KEYS = ("food", "price", "diet")
+
+    @classmethod
+    def from_dict(cls, item):
+        if isinstance(item, cls):
+            return item
+        # Hinnat toistuvat ("14,50 €"), joten ne internoidaan
+        return cls(item["food"], sys.intern(item.get("price", "")), item.get("diet", 0))
+
+
+@dataclass(slots=True, eq=False)
+class Restaurant(_Record):
+    """Ravintolan paivan tulos. stale = viimeisin toimiva menu, uusin haku epaonnistui."""
+
+    info: RestaurantInfo
+    menu: list
+    failed: bool = False
+    stale: bool = False
+
+    _FRESH_KEYS = ("name", "address", "source", "menu", "url", "hours", "price_info", "failed")
+    _STALE_KEYS = _FRESH_KEYS + ("stale",)
+
+    @property
+    def _KEYS(self):
+        return self._STALE_KEYS if self.stale else self._FRESH_KEYS
+
+    @property
+    def name(self):
+        return self.info.name
+
+    @property
+    def address(self):
+        return self.info.address
+
+    @property
+    def source(self):
+        return self.info.source
+
+    @property
+    def url(self):
+        return self.info.url
+
+    @property
+    def hours(self):
+        return self.info.hours
+
+    @property
+    def price_info(self):
+        return self.info.price_info
+
+    @classmethod
+    def from_dict(cls, result):
+        if isinstance(result, cls):
+            return result
+        info = restaurant_info(result["name"], result.get("address", ""), result.get("source", ""),
+                               result.get("url", ""), result.get("hours", ""), result.get("price_info", ""))
+        return cls(info, menu_items(result.get("menu", [])), result.get("failed", False), result.get("stale", False))
+
+
+def menu_items(items):
+    return [MenuItem.from_dict(item) for item in items]
+
+
+def load_payload(data):
+    """Valimuistista purettu sivun data: ravintolat malleiksi (muu data sellaisenaan)."""
+    if not data or "restaurants" not in data:
+        return data
+    return {**data, "restaurants": [Restaurant.from_dict(r) for r in data["restaurants"]]}
+
+
+# ============================================================
+# SARJALLISTUS
+# ============================================================
+
+def _default(obj):
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"{type(obj).__name__} ei ole sarjallistettavissa")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value, sort_keys=False):
+        """JSON tavuina (UTF-8). sort_keys antaa vakaan esityksen tiivisteita varten."""
+        return orjson.dumps(value, default=_default, option=_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+
+    loads = orjson.loads
+else:
+    def dumps(value, sort_keys=False):
+        """JSON tavuina (UTF-8). sort_keys antaa vakaan esityksen tiivisteita varten."""
+        return json.dumps(value, default=_default, ensure_ascii=False, sort_keys=sort_keys,
+                          separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
@@ -0,0 +1,160 @@
+"""
+Ruoholahden Lounas - Esilammitysajastin
+Scrapaa lounaslistat valimuistiin ennen lounasruuhkaa, jotta pyyntojen
+kasittelijat vain lukevat valimuistia.
+
+Ajetaan joko erillisena prosessina (vaatii jaetun valimuistin,
+LOUNAS_CACHE_BACKEND=sqlite, jotta web-workerit nakevat tuloksen):
+    LOUNAS_CACHE_BACKEND=sqlite python -m scheduler
+tai web-prosessin sisalla (LOUNAS_SCHEDULER=1), jolloin jokainen gunicorn-worker
+kaynnistaa ajastinsaikeen ja jaetun valimuistin lukko valitsee jokaiselle
+ajokerralle yhden suorittajan.
+
+Aikataulu ymparistomuuttujilla:
+    LOUNAS_PREWARM_TIMES  - kiinteat ajat, esim. "10:00,10:30,11:00"
+    LOUNAS_PREWARM_PEAK   - ruuhkajakso ja vali minuutteina, esim. "10:45-13:00/10"
+    LOUNAS_PREWARM_DAYS   - viikonpaivat (0 = maanantai), esim. "0-4" tai "0,2,4"
+
+Jos LOUNAS_EXPORT_DIR on asetettu, jokainen esilammitys vie myos staattisen
+sivuston (ks. export.py).
+"""
+
+import os
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+
+from scrapers import FINLAND_TZ
+
+logger = logging.getLogger(__name__)
+
+PREWARM_TIMES = os.environ.get("LOUNAS_PREWARM_TIMES", "10:00,10:30,11:00")
+PREWARM_PEAK = os.environ.get("LOUNAS_PREWARM_PEAK", "11:00-13:00/10")
+PREWARM_DAYS = os.environ.get("LOUNAS_PREWARM_DAYS", "0-4")
+
+# Ajokerran lukko on voimassa pidempaan kuin workereiden kellojen ero
+SLOT_LOCK_TTL_SECONDS = 300
+
+
+def _parse_hhmm(value):
+    hours, minutes = value.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_days(spec):
+    """"0-4" tai "0,2,4" -> joukko viikonpaivien indeksejä."""
+    days = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            days.update(range(int(start), int(end) + 1))
+        else:
+            days.add(int(part))
+    return days
+
+
+def parse_timetable(times=PREWARM_TIMES, peak=PREWARM_PEAK):
+    """
+    Palauttaa ajokerrat minuutteina keskiyosta jarjestettyna listana.
+    times: "10:00,10:30", peak: "10:45-13:00/10" (alku-loppu/vali).
+    """
+    slots = set()
+    for value in times.split(","):
+        if value.strip():
+            slots.add(_parse_hhmm(value))
+    if peak.strip():
+        span, _, step = peak.partition("/")
+        start, end = span.split("-")
+        step = int(step or 10)
+        slots.update(range(_parse_hhmm(start), _parse_hhmm(end) + 1, step))
+    return sorted(slots)
+
+
+def next_run(now, slots, days):
+    """
+    Palauttaa seuraavan ajohetken (datetime) hetken now jalkeen. Ajat ovat
+    seinakelloaikaa now:n aikavyohykkeessa (FINLAND_TZ seuraa kesaaikaa).
+    """
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    for offset in range(8):
+        day = midnight + timedelta(days=offset)
+        if day.weekday() not in days:
+            continue
+        for slot in slots:
+            candidate = day + timedelta(minutes=slot)
+            if candidate > now:
+                return candidate
+    return None
+
+
+def run_slot(slot_time):
+    """Ajaa yhden esilammityksen, jos tama prosessi voittaa ajokerran lukon."""
+    import app
+
+    lock_name = f"prewarm:{slot_time.strftime('%Y-%m-%dT%H:%M')}"
+    if app._cache.acquire(lock_name, SLOT_LOCK_TTL_SECONDS) is None:
+        logger.info(f"Esilammitys {slot_time:%H:%M} ajetaan toisessa prosessissa")
+        return False
+
+    started = time.monotonic()
+    try:
+        data = app.refresh_all_locations(force=True)
+        count = sum(len(d.get("restaurants", [])) for d in data.values())
+        logger.info(f"Esilammitys {slot_time:%H:%M} valmis: {len(data)} sijaintia, {count} ravintolaa, "
+                    f"{time.monotonic() - started:.1f} s")
+        if os.environ.get("LOUNAS_EXPORT_DIR"):
+            import export
+            version, created = export.export(export.EXPORT_DIR)
+            logger.info(f"Staattinen vienti: {version}{'' if created else ' (ei muutoksia)'}")
+    except Exception as e:
+        logger.error(f"Esilammitys {slot_time:%H:%M} epaonnistui: {e}")
+    return True
+
+
+def run_forever(stop_event=None, slots=None, days=None):
+    """Ajastinsilmukka. Paattyy kun stop_event asetetaan."""
+    stop_event = stop_event or threading.Event()
+    slots = parse_timetable() if slots is None else slots
+    days = parse_days(PREWARM_DAYS) if days is None else days
+    if not slots or not days:
+        logger.warning("Esilammityksen aikataulu on tyhja, ajastin ei kaynnisty")
+        return
+
+    while not stop_event.is_set():
+        now = datetime.now(FINLAND_TZ)
+        slot_time = next_run(now, slots, days)
+        if slot_time is None:
+            return
+        logger.info(f"Seuraava esilammitys {slot_time:%a %d.%m. %H:%M}")
+        # timestamp() huomioi kesaajan vaihteen, pelkka erotus samassa vyohykkeessa ei
+        if stop_event.wait(max(slot_time.timestamp() - now.timestamp(), 0)):
+            return
+        run_slot(slot_time)
+
+
+def start_in_background():
+    """Kaynnistaa ajastimen daemon-saikeena web-prosessin sisalla."""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=run_forever, args=(stop_event,), name="prewarm-scheduler", daemon=True)
+    thread.start()
+    return stop_event
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # Erillinen prosessi lammittaa vain oman valimuistinsa, ellei tausta ole jaettu
+    if os.environ.get("LOUNAS_CACHE_BACKEND", "memory").strip().lower() != "sqlite":
+        if not os.environ.get("LOUNAS_EXPORT_DIR"):
+            raise SystemExit("Erillinen ajastin tarvitsee jaetun valimuistin: aseta LOUNAS_CACHE_BACKEND=sqlite "
+                             "(tai kaynnista ajastin web-prosessissa LOUNAS_SCHEDULER=1)")
+        logger.warning("LOUNAS_CACHE_BACKEND ei ole sqlite: web-workerit eivat nae esilammitysta, "
+                       "vain staattinen vienti paivittyy")
+    print(f"Esilammitysajastin: ajat {PREWARM_TIMES}, ruuhka {PREWARM_PEAK}, paivat {PREWARM_DAYS}")
+    try:
+        run_forever()
+    except KeyboardInterrupt:
+        pass
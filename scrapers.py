@@ -1,8 +1,8 @@
 """
 Ruoholahden Lounas - Scraping-moduuli
-Hakee tarkat paivan lounaslistat 7 ravintolasta suoraan ravintoloiden omilta sivuilta.
+Hakee tarkat paivan lounaslistat suoraan ravintoloiden omilta sivuilta.
 
-Ravintolat:
+Ravintolat ja niiden parseristrategiat ovat restaurants.json-tiedostossa:
 1. Oasis (Nordrest) - nordrest.fi
 2. Gresa (Nordrest) - nordrest.fi
 3. HALO Food & Events - halorestaurant.fi
@@ -12,14 +12,31 @@ Ravintolat:
 7. Salve - lounaat.info (fallback)
 """
 
-import requests
-from bs4 import BeautifulSoup
+import diets
+import http_client
+import metrics
+import models
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, date, timezone, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import copy
+import json
+import os
 import re
+import threading
+import time
 import logging
 
-# Suomen aikavyohyke (UTC+2, kesaaikana UTC+3)
-FINLAND_TZ = timezone(timedelta(hours=2))
+# "auto" = kohdistettu parsinta (selectolax tai SoupStrainer), "strainer" = vain
+# SoupStrainer, "full" = koko sivu kuten ennen
+PARSE_MODE = os.environ.get("LOUNAS_PARSE_MODE", "auto")
+
+# Suomen aikavyohyke (UTC+2, kesaaikana UTC+3). Ilman aikavyohyketietokantaa
+# (esim. Windows ilman tzdata-pakettia) kaytetaan kiinteaa UTC+2:ta.
+try:
+    FINLAND_TZ = ZoneInfo("Europe/Helsinki")
+except ZoneInfoNotFoundError:
+    FINLAND_TZ = timezone(timedelta(hours=2))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,6 +47,11 @@ HEADERS = {
     "Accept-Language": "fi-FI,fi;q=0.9,en;q=0.8",
 }
 
+# Rinnakkaisen haun asetukset: koko haun ja yksittaisen ravintolan takaraja sekunteina
+FETCH_MAX_WORKERS = int(os.environ.get("LOUNAS_FETCH_WORKERS", "8"))
+FETCH_DEADLINE_SECONDS = float(os.environ.get("LOUNAS_FETCH_DEADLINE", "20"))
+RESTAURANT_DEADLINE_SECONDS = float(os.environ.get("LOUNAS_RESTAURANT_DEADLINE", "15"))
+
 WEEKDAYS_FI = ["Maanantai", "Tiistai", "Keskiviikko", "Torstai", "Perjantai", "Lauantai", "Sunnuntai"]
 WEEKDAYS_FI_LOWER = [d.lower() for d in WEEKDAYS_FI]
 
@@ -47,478 +69,917 @@ def get_today_weekday_index():
     return _today_finland().weekday()
 
 
+def _weekday_in(text):
+    """Palauttaa ensimmaisen tekstista loytyvan viikonpaivan indeksin (0 = maanantai) tai None."""
+    text = text.lower()
+    for idx, name in enumerate(WEEKDAYS_FI_LOWER):
+        if name in text:
+            return idx
+    return None
+
+
+def parse_day(value, today=None):
+    """
+    Tulkitsee paivakyselyn: "today"/"tanaan", "tomorrow"/"huomenna",
+    ISO-paivamaara (2026-02-05) tai taman viikon viikonpaiva ("torstai").
+    Palauttaa date-olion tai None jos arvoa ei tunnisteta.
+    """
+    today = today or _today_finland()
+    value = (value or "").strip().lower()
+    if value in ("", "today", "tanaan", "tänään"):
+        return today
+    if value in ("tomorrow", "huomenna"):
+        return today + timedelta(days=1)
+    if value in WEEKDAYS_FI_LOWER:
+        return today + timedelta(days=WEEKDAYS_FI_LOWER.index(value) - today.weekday())
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _request_timeout(timeout):
+    """
+    Yksittaisen yrityksen aikakatkaisu: fetcherin jaljella oleva takaraja
+    jaettuna kaikille yrityksille (ks. http_client.RETRIES), enintaan timeout.
+    Palauttaa None jos takaraja on jo ylittynyt.
+    """
+    at = getattr(_fetch_deadline, "at", None)
+    if at is None:
+        return timeout
+    remaining = at - time.monotonic()
+    if remaining <= 0:
+        return None
+    return min(timeout, remaining / (http_client.RETRIES + 1))
+
+
 def _safe_request(url, timeout=15):
+    timeout = _request_timeout(timeout)
+    if timeout is None:
+        logger.warning(f"HTTP-pyynto ohitettu, takaraja ylittyi ({url})")
+        return None
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
-        resp.raise_for_status()
-        return resp
+        return http_client.get(url, headers=HEADERS, timeout=timeout)
     except Exception as e:
         logger.warning(f"HTTP-pyynto epaonnistui ({url}): {e}")
         return None
 
 
 # ============================================================
-# 1. OASIS (Nordrest)
+# nordrest-lunch-list - Nordrestin lounaslista (Oasis)
 # Rakenne: h3.lunch-day-title + ul.lunch-list > li.lunch-item
 # ============================================================
 
-def fetch_oasis():
-    url = "https://nordrest.fi/restaurang/ravintola-oasis/"
-    today_weekday = get_today_weekday_fi().lower()
-
-    resp = _safe_request(url)
-    if not resp:
-        return _make_result("Ravintola Oasis", "Mechelininkatu 1a, 00180 Helsinki",
-                            "nordrest.fi", [], url, "Ma-Pe lounas", "Lounas 14 \u20ac")
-
-    try:
-        soup = BeautifulSoup(resp.text, "html.parser")
-        menu_items = []
-
-        # Etsi h3.lunch-day-title joka sisaltaa tanaan viikonpaivan
-        for h3 in soup.find_all("h3", class_="lunch-day-title"):
-            if today_weekday in h3.get_text(strip=True).lower():
-                # Seuraava sibling on ul.lunch-list
-                ul = h3.find_next_sibling("ul", class_="lunch-list")
-                if ul:
-                    for li in ul.find_all("li", class_="lunch-item"):
-                        text = li.get_text(strip=True)
-                        if text and len(text) > 3:
-                            menu_items.append({"food": text, "price": ""})
-                break
-
-        # Fallback: jos lunch-day-title ei loydy, kokeile tavallisia h3-tageja
-        if not menu_items:
-            for h3 in soup.find_all("h3"):
-                h3_text = h3.get_text(strip=True).lower()
-                if today_weekday == h3_text:
-                    # Seuraava sibling on div jossa menu
-                    sib = h3.find_next_sibling()
-                    while sib:
-                        sib_text = sib.get_text(strip=True).lower()
-                        if any(d == sib_text for d in WEEKDAYS_FI_LOWER[:5] if d != today_weekday):
-                            break
-                        if sib.name == "div" and len(sib.get_text(strip=True)) > 10:
-                            text = sib.get_text(strip=True)
-                            # Parsitaan rivit
-                            parts = re.split(r'(?=Päivän keitto:|Tarjoillaan )', text)
-                            for part in parts:
-                                part = part.strip()
-                                if part and len(part) > 5 and not part.startswith("Lounaslistaviikko"):
-                                    menu_items.append({"food": part, "price": ""})
-                        sib = sib.find_next_sibling()
+def _parse_oasis(soup):
+    week = {}
+
+    # h3.lunch-day-title sisaltaa viikonpaivan, seuraava sibling on ul.lunch-list
+    for h3 in soup.find_all("h3", class_="lunch-day-title"):
+        idx = _weekday_in(h3.get_text(strip=True))
+        if idx is None or idx in week:
+            continue
+        items = []
+        ul = h3.find_next_sibling("ul", class_="lunch-list")
+        if ul:
+            for li in ul.find_all("li", class_="lunch-item"):
+                text = li.get_text(strip=True)
+                if text and len(text) > 3:
+                    items.append({"food": text, "price": ""})
+        week[idx] = items
+
+    # Fallback: jos lunch-day-title ei loydy, kokeile tavallisia h3-tageja
+    if not any(week.values()):
+        week = {}
+        for h3 in soup.find_all("h3"):
+            h3_text = h3.get_text(strip=True).lower()
+            if h3_text not in WEEKDAYS_FI_LOWER[:5]:
+                continue
+            idx = WEEKDAYS_FI_LOWER.index(h3_text)
+            if idx in week:
+                continue
+            items = []
+            # Seuraava sibling on div jossa menu
+            sib = h3.find_next_sibling()
+            while sib:
+                sib_text = sib.get_text(strip=True).lower()
+                if any(d == sib_text for d in WEEKDAYS_FI_LOWER[:5] if d != h3_text):
                     break
+                if sib.name == "div" and len(sib.get_text(strip=True)) > 10:
+                    text = sib.get_text(strip=True)
+                    # Parsitaan rivit
+                    parts = re.split(r'(?=Päivän keitto:|Tarjoillaan )', text)
+                    for part in parts:
+                        part = part.strip()
+                        if part and len(part) > 5 and not part.startswith("Lounaslistaviikko"):
+                            items.append({"food": part, "price": ""})
+                sib = sib.find_next_sibling()
+            week[idx] = items
 
-        return _make_result("Ravintola Oasis", "Mechelininkatu 1a, 00180 Helsinki",
-                            "nordrest.fi", menu_items, url, "Ma-Pe lounas", "Lounas 14 \u20ac")
-    except Exception as e:
-        logger.warning(f"Oasis parsinta epaonnistui: {e}")
-        return _make_result("Ravintola Oasis", "Mechelininkatu 1a, 00180 Helsinki",
-                            "nordrest.fi", [], url, "Ma-Pe lounas", "Lounas 14 \u20ac")
+    return week
 
 
 # ============================================================
-# 2. GRESA (Nordrest)
+# nordrest-paragraphs - Nordrestin p-tagilista (Gresa)
 # Rakenne: p "VIIKKO 6 & 7" -> p "Torstai" -> p (ruokalaji) x N -> p (seuraava paiva)
 # Gresa kayttaa p-tageja, viikonpaiva on erillinen p, seuraavat p:t ovat ruokalajeja
 # ============================================================
 
-def fetch_gresa():
-    url = "https://nordrest.fi/restaurang/gresa/"
-    today_weekday = get_today_weekday_fi()
+def _parse_gresa(soup):
+    week = {}
+    current = None
 
-    resp = _safe_request(url)
-    if not resp:
-        return _make_result("Gresa", "Itämerenkatu 1, 00180 Helsinki",
-                            "nordrest.fi", [], url, "Ma-Pe 10:45-13:45", "Lounas 13,70 \u20ac")
+    for p in soup.find_all("p"):
+        text = p.get_text(strip=True)
 
-    try:
-        soup = BeautifulSoup(resp.text, "html.parser")
-        menu_items = []
-
-        # Etsi ensimmainen p-tagi joka on tasan viikonpaiva ("Torstai")
-        all_ps = soup.find_all("p")
-        capture = False
-        for p in all_ps:
-            text = p.get_text(strip=True)
+        # Viikonpaiva omana p-tagina ("Torstai") aloittaa uuden paivan
+        if text.lower() in WEEKDAYS_FI_LOWER[:5]:
+            idx = WEEKDAYS_FI_LOWER.index(text.lower())
+            current = None if idx in week else idx
+            if current is not None:
+                week[current] = []
+            continue
 
-            if text.lower() == today_weekday.lower() and not capture:
-                capture = True
-                continue
+        if current is None:
+            continue
+        # Ohita tyhjat ja englanninkieliset kaannokset
+        if not text or len(text) < 3:
+            continue
+        # Ohita englanninkieliset rivit (alkavat isolla ja sisaltavat "and", "with")
+        if any(kw in text.lower() for kw in [" and ", " with ", "served with", "potato mash", "fried "]):
+            continue
+        week[current].append({"food": text, "price": ""})
 
-            if capture:
-                # Lopeta kun seuraava viikonpaiva loytyy (tai englanninkielinen kaannos)
-                if text.lower() in WEEKDAYS_FI_LOWER[:5] and text.lower() != today_weekday.lower():
-                    break
-                # Ohita tyhjat ja englanninkieliset kaannokset
-                if not text or len(text) < 3:
-                    continue
-                # Ohita englanninkieliset rivit (alkavat isolla ja sisaltavat "and", "with")
-                if any(kw in text.lower() for kw in [" and ", " with ", "served with", "potato mash", "fried "]):
-                    continue
-                # Ohita rivit jotka sisaltavat "Runebergin" jalkeen tulevat ylimaaraiset
-                menu_items.append({"food": text, "price": ""})
-
-                # Maks 6 ruokalajia per paiva
-                if len(menu_items) >= 6:
-                    break
+        # Maks 6 ruokalajia per paiva
+        if len(week[current]) >= 6:
+            current = None
 
-        return _make_result("Gresa", "Itämerenkatu 1, 00180 Helsinki",
-                            "nordrest.fi", menu_items, url, "Ma-Pe 10:45-13:45", "Lounas 13,70 \u20ac")
-    except Exception as e:
-        logger.warning(f"Gresa parsinta epaonnistui: {e}")
-        return _make_result("Gresa", "Itämerenkatu 1, 00180 Helsinki",
-                            "nordrest.fi", [], url, "Ma-Pe 10:45-13:45", "Lounas 13,70 \u20ac")
+    return week
 
 
 # ============================================================
-# 3. HALO Food & Events
+# dated-paragraphs - paivamaaralliset p-otsikot (HALO Food & Events)
 # Rakenne: p "Torstai 5.2." -> p "PICK IT 14 €- ruokalaji" x 4
 # ============================================================
 
-def fetch_halo():
-    url = "https://halorestaurant.fi/lounas/"
-    today_weekday = get_today_weekday_fi().lower()
-
-    resp = _safe_request(url)
-    if not resp:
-        return _make_result("HALO Food & Events", "Ruoholahdenkatu 21, 00180 Helsinki",
-                            "halorestaurant.fi", [], url, "Ma-Pe 11:00-13:30",
-                            "14 \u20ac / Love it 14,70 \u20ac / Keitto 12,90 \u20ac")
-
-    try:
-        soup = BeautifulSoup(resp.text, "html.parser")
-        menu_items = []
-        capture = False
-
-        for p in soup.find_all("p"):
-            text = p.get_text(strip=True)
-            if not text:
+def _parse_halo(soup):
+    week = {}
+    current = None
+
+    for p in soup.find_all("p"):
+        text = p.get_text(strip=True)
+        if not text:
+            continue
+
+        # Paivan otsikko: "Torstai 5.2."
+        if re.search(r'\d+\.\d+', text):
+            idx = _weekday_in(text)
+            if idx is not None and idx < 5:
+                current = None if idx in week else idx
+                if current is not None:
+                    week[current] = []
                 continue
 
-            # Paivan otsikko: "Torstai 5.2."
-            if today_weekday in text.lower() and re.search(r'\d+\.\d+', text):
-                capture = True
-                continue
-
-            if capture:
-                # Seuraava paiva -> lopeta
-                is_next_day = False
-                for d in WEEKDAYS_FI_LOWER[:5]:
-                    if d != today_weekday and d in text.lower() and re.search(r'\d+\.\d+', text):
-                        is_next_day = True
-                        break
-                if is_next_day:
-                    break
+        if current is not None and len(text) > 5:
+            text = re.sub(r'\s+', ' ', text)
+            week[current].append({"food": text, "price": ""})
 
-                if len(text) > 5:
-                    text = re.sub(r'\s+', ' ', text)
-                    menu_items.append({"food": text, "price": ""})
-
-        return _make_result("HALO Food & Events", "Ruoholahdenkatu 21, 00180 Helsinki",
-                            "halorestaurant.fi", menu_items, url, "Ma-Pe 11:00-13:30",
-                            "14 \u20ac / Love it 14,70 \u20ac / Keitto 12,90 \u20ac")
-    except Exception as e:
-        logger.warning(f"HALO parsinta epaonnistui: {e}")
-        return _make_result("HALO Food & Events", "Ruoholahdenkatu 21, 00180 Helsinki",
-                            "halorestaurant.fi", [], url, "Ma-Pe 11:00-13:30",
-                            "14 \u20ac / Love it 14,70 \u20ac / Keitto 12,90 \u20ac")
+    return week
 
 
 # ============================================================
-# 4. MORTON
+# fdm-sections - Food and Drink Menu -lisaosan osiot (Morton)
 # Rakenne: li.fdm-section-header (h3 "Torstaisin") -> li (fdm-item-title, fdm-item-price, fdm-item-content)
 # ============================================================
 
-def fetch_morton():
-    url = "https://morton.fi/lounas/"
-    today_idx = get_today_weekday_index()
-    morton_days = ["maanantaisin", "tiistaisin", "keskiviikkoisin", "torstaisin", "perjantaisin"]
-    if today_idx >= 5:
-        return _make_result("Konttiravintola Morton", "Ruoholahdenranta 8, 00180 Helsinki",
-                            "morton.fi", [], url, "Ma-Pe 11:00-14:00", "Lounas 14,50 \u20ac")
-    today_morton = morton_days[today_idx]
-
-    resp = _safe_request(url)
-    if not resp:
-        return _make_result("Konttiravintola Morton", "Ruoholahdenranta 8, 00180 Helsinki",
-                            "morton.fi", [], url, "Ma-Pe 11:00-14:00", "Lounas 14,50 \u20ac")
+MORTON_DAYS = ["maanantaisin", "tiistaisin", "keskiviikkoisin", "torstaisin", "perjantaisin"]
 
-    try:
-        soup = BeautifulSoup(resp.text, "html.parser")
-        menu_items = []
 
-        # Etsi li.fdm-section-header jossa on tanaan paiva
-        for li_header in soup.find_all("li", class_="fdm-section-header"):
-            header_text = li_header.get_text(strip=True).lower()
-            if today_morton in header_text:
-                # Seuraavat sibling-li:t ovat ruokalajeja
-                sib = li_header.find_next_sibling()
-                while sib:
-                    if sib.name == "li":
-                        cls = sib.get("class", [])
-                        if "fdm-section-header" in cls:
-                            break  # seuraava paiva
-                        # Ruokalaji
-                        title_el = sib.find(class_="fdm-item-title")
-                        price_el = sib.find(class_="fdm-item-price")
-                        desc_el = sib.find(class_="fdm-item-content")
-
-                        title = title_el.get_text(strip=True) if title_el else ""
-                        price = price_el.get_text(strip=True) if price_el else ""
-                        desc = desc_el.get_text(strip=True) if desc_el else ""
-
-                        if title and "Lasten lounas" not in title and "Juomatarjoukset" not in title:
-                            food_text = f"{title} - {desc}" if desc else title
-                            # Siisti kuvaus
-                            food_text = re.sub(r'(laktoositon|gluteeniton|vähälaktoosinen|saatavana vegaanisena|saatavana laktoosittomana|saatavana gluteenittomana \+\d+€)', '', food_text)
-                            food_text = re.sub(r'\s+', ' ', food_text).strip()
-                            menu_items.append({"food": food_text, "price": "14,50 \u20ac"})
-                    sib = sib.find_next_sibling()
-                break
-
-        return _make_result("Konttiravintola Morton", "Ruoholahdenranta 8, 00180 Helsinki",
-                            "morton.fi", menu_items, url, "Ma-Pe 11:00-14:00", "Lounas 14,50 \u20ac")
-    except Exception as e:
-        logger.warning(f"Morton parsinta epaonnistui: {e}")
-        return _make_result("Konttiravintola Morton", "Ruoholahdenranta 8, 00180 Helsinki",
-                            "morton.fi", [], url, "Ma-Pe 11:00-14:00", "Lounas 14,50 \u20ac")
+def _parse_morton(soup):
+    week = {}
 
+    for li_header in soup.find_all("li", class_="fdm-section-header"):
+        header_text = li_header.get_text(strip=True).lower()
+        idx = next((i for i, d in enumerate(MORTON_DAYS) if d in header_text), None)
+        if idx is None or idx in week:
+            continue
 
-# ============================================================
-# 5. THE PANTRY RUOHOLAHTI
-# Rakenne: h3 "TORSTAI 5.2.2026" -> h4 "PAIVAN KASVIS" -> p (ruoka + kuvaus)
-# ============================================================
+        items = []
+        # Seuraavat sibling-li:t ovat ruokalajeja
+        sib = li_header.find_next_sibling()
+        while sib:
+            if sib.name == "li":
+                cls = sib.get("class", [])
+                if "fdm-section-header" in cls:
+                    break  # seuraava paiva
+                # Ruokalaji
+                title_el = sib.find(class_="fdm-item-title")
+                price_el = sib.find(class_="fdm-item-price")
+                desc_el = sib.find(class_="fdm-item-content")
 
-def fetch_pantry():
-    url = "https://thepantry.fi/ruoholahti/"
-    today_weekday = get_today_weekday_fi().upper()
+                title = title_el.get_text(strip=True) if title_el else ""
+                price = price_el.get_text(strip=True) if price_el else ""
+                desc = desc_el.get_text(strip=True) if desc_el else ""
 
-    resp = _safe_request(url)
-    if not resp:
-        return _make_result("The Pantry Ruoholahti", "Itämerenkatu 3, 00180 Helsinki",
-                            "thepantry.fi", [], url, "Ma-Pe 11:00-13:30", "Kasvis 14 \u20ac / Kala-Liha 15 \u20ac")
+                if title and "Lasten lounas" not in title and "Juomatarjoukset" not in title:
+                    food_text = f"{title} - {desc}" if desc else title
+                    # Ruokavaliot talteen ennen kuin merkinnat siivotaan kuvauksesta
+                    diet = diets.extract(food_text)
+                    food_text = re.sub(r'(laktoositon|gluteeniton|vähälaktoosinen|saatavana vegaanisena|saatavana laktoosittomana|saatavana gluteenittomana \+\d+€)', '', food_text)
+                    food_text = re.sub(r'\s+', ' ', food_text).strip()
+                    items.append({"food": food_text, "price": "14,50 \u20ac", "diet": diet})
+            sib = sib.find_next_sibling()
+        week[idx] = items
 
-    try:
-        soup = BeautifulSoup(resp.text, "html.parser")
-        menu_items = []
-        found_today = False
+    return week
 
-        for tag in soup.find_all(["h3", "h4", "p"]):
-            text = tag.get_text(strip=True)
 
-            if tag.name == "h3" and today_weekday in text.upper():
-                found_today = True
-                continue
+# ============================================================
+# day-categories - paivan h3 ja kategorioiden h4 (The Pantry Ruoholahti)
+# Rakenne: h3 "TORSTAI 5.2.2026" -> h4 "PAIVAN KASVIS" -> p (ruoka + kuvaus)
+# ============================================================
 
-            if found_today and tag.name == "h3":
-                weekdays_upper = [d.upper() for d in WEEKDAYS_FI[:5]]
-                if any(d in text.upper() for d in weekdays_upper if d != today_weekday):
-                    break
+def _parse_pantry(soup):
+    week = {}
+    current = None
+
+    for tag in soup.find_all(["h3", "h4", "p"]):
+        text = tag.get_text(strip=True)
+
+        if tag.name == "h3":
+            idx = _weekday_in(text)
+            if idx is not None and idx < 5:
+                current = None if idx in week else idx
+                if current is not None:
+                    week[current] = []
+            continue
+
+        if current is not None and tag.name == "h4":
+            category = text  # "PAIVAN KASVIS", "PAIVAN KALA", "PAIVAN LIHA"
+            next_p = tag.find_next("p")
+            if next_p:
+                food_text = next_p.get_text(strip=True)
+                if food_text and len(food_text) > 3:
+                    price = "14 \u20ac" if "KASVIS" in category.upper() else "15 \u20ac"
+                    week[current].append({
+                        "food": f"{category}: {food_text}",
+                        "price": price,
+                    })
 
-            if found_today and tag.name == "h4":
-                category = text  # "PAIVAN KASVIS", "PAIVAN KALA", "PAIVAN LIHA"
-                next_p = tag.find_next("p")
-                if next_p:
-                    food_text = next_p.get_text(strip=True)
-                    if food_text and len(food_text) > 3:
-                        price = "14 \u20ac" if "KASVIS" in category.upper() else "15 \u20ac"
-                        menu_items.append({
-                            "food": f"{category}: {food_text}",
-                            "price": price,
-                        })
-
-        return _make_result("The Pantry Ruoholahti", "Itämerenkatu 3, 00180 Helsinki",
-                            "thepantry.fi", menu_items, url, "Ma-Pe 11:00-13:30", "Kasvis 14 \u20ac / Kala-Liha 15 \u20ac")
-    except Exception as e:
-        logger.warning(f"Pantry parsinta epaonnistui: {e}")
-        return _make_result("The Pantry Ruoholahti", "Itämerenkatu 3, 00180 Helsinki",
-                            "thepantry.fi", [], url, "Ma-Pe 11:00-13:30", "Kasvis 14 \u20ac / Kala-Liha 15 \u20ac")
+    return week
 
 
 # ============================================================
-# 6. POMPIER ALBERTINKATU
+# accordion - Beaver Builderin haitari (Pompier Albertinkatu)
 # Rakenne: div.fl-accordion-item -> a.fl-accordion-button-label (paiva)
 #          -> div.fl-accordion-content > p (menu)
 # ============================================================
 
-def fetch_pompier():
-    url = "https://pompier.fi/albertinkatu/albertinkatu-menu/"
-    today_weekday = get_today_weekday_fi().lower()
-    today_day = date.today().day
+def _parse_pompier(soup):
+    week = {}
+
+    for item in soup.find_all("div", class_="fl-accordion-item"):
+        label = item.find(class_="fl-accordion-button-label")
+        content = item.find(class_="fl-accordion-content")
+        if not label or not content:
+            continue
+
+        # Paivan otsikko: "Torstai 5.2."
+        idx = _weekday_in(label.get_text(strip=True))
+        if idx is None or idx in week:
+            continue
+
+        items = []
+        menu_text = content.get_text(strip=True)
+        if menu_text:
+            # Parsitaan hintojen mukaan
+            parts = re.split(r'(\d+[,\.]\d{2}\s*€)', menu_text)
+            i = 0
+            while i < len(parts):
+                food = parts[i].strip()
+                price = ""
+                if i + 1 < len(parts) and re.match(r'\d+[,\.]\d{2}\s*€', parts[i + 1]):
+                    price = parts[i + 1].strip()
+                    i += 2
+                else:
+                    i += 1
+                if food and len(food) > 3:
+                    items.append({"food": food, "price": price})
+        week[idx] = items
+
+    return week
 
-    resp = _safe_request(url)
-    if not resp:
-        return _make_result("Pompier Albertinkatu", "Albertinkatu 29, 00180 Helsinki",
-                            "pompier.fi", [], url, "Ma-Pe 10:45-14:00", "Lounas 14,50 \u20ac / Kaikki 19 \u20ac")
 
-    try:
-        soup = BeautifulSoup(resp.text, "html.parser")
+# ============================================================
+# lounaat.info - osoitehaun tuloslista (Salve)
+# Rakenne: .menu -> .item-header h3 a (nimi), .item-body .menu-item -> p.price, p.dish, p.info
+# Sivu listaa kaikki lahiravintolat, joten yksi haku palvelee jokaista sivua
+# kayttavaa ravintolaa. Osoitehaku nayttaa vain tanaan paivan, joten
+# viikkoindeksiin tulee yksi paiva kerrallaan.
+# ============================================================
+
+def _parse_lounaat(soup, weekday):
+    """
+    Palauttaa {nimi pienilla kirjaimilla: ({weekday: menu_items}, {"hours": ...})}
+    jokaisesta sivun ravintolasta.
+    """
+    restaurants = {}
+    for item in soup.select(".menu"):
+        name_el = item.select_one(".item-header h3 a")
+        if not name_el:
+            continue
+        name = name_el.get_text(strip=True).lower()
+        if name in restaurants:
+            continue
+
         menu_items = []
+        for li in item.select(".item-body .menu-item"):
+            price_el = li.select_one("p.price")
+            dish_el = li.select_one("p.dish")
+            info_el = li.select_one("p.info")
 
-        for item in soup.find_all("div", class_="fl-accordion-item"):
-            label = item.find(class_="fl-accordion-button-label")
-            content = item.find(class_="fl-accordion-content")
-            if not label or not content:
-                continue
+            price = price_el.get_text(strip=True) if price_el else ""
+            dish = dish_el.get_text(strip=True) if dish_el else ""
+            info = ""
+            if info_el:
+                info = info_el.get_text(strip=True)
+                info = re.sub(r'\s+', ' ', info).strip()
 
-            label_text = label.get_text(strip=True).lower()
-            # Etsi tanaan paiva: "Torstai 5.2."
-            if today_weekday in label_text:
-                menu_text = content.get_text(strip=True)
-                if menu_text:
-                    # Parsitaan hintojen mukaan
-                    parts = re.split(r'(\d+[,\.]\d{2}\s*€)', menu_text)
-                    i = 0
-                    while i < len(parts):
-                        food = parts[i].strip()
-                        price = ""
-                        if i + 1 < len(parts) and re.match(r'\d+[,\.]\d{2}\s*€', parts[i + 1]):
-                            price = parts[i + 1].strip()
-                            i += 2
-                        else:
-                            i += 1
-                        if food and len(food) > 3:
-                            menu_items.append({"food": food, "price": price})
-                break
-
-        return _make_result("Pompier Albertinkatu", "Albertinkatu 29, 00180 Helsinki",
-                            "pompier.fi", menu_items, url, "Ma-Pe 10:45-14:00",
-                            "Lounas 14,50 \u20ac / Kaikki 19 \u20ac")
-    except Exception as e:
-        logger.warning(f"Pompier parsinta epaonnistui: {e}")
-        return _make_result("Pompier Albertinkatu", "Albertinkatu 29, 00180 Helsinki",
-                            "pompier.fi", [], url, "Ma-Pe 10:45-14:00", "Lounas 14,50 \u20ac / Kaikki 19 \u20ac")
+            food_text = f"{dish} {info}".strip() if dish else info.strip()
+            if food_text and len(food_text) > 3:
+                menu_items.append({"food": food_text, "price": price})
+
+        # Aukioloaika
+        hours_el = item.select_one(".item-header p.lunch")
+        hours = hours_el.get_text(strip=True) if hours_el else ""
+        restaurants[name] = ({weekday: menu_items}, {"hours": hours} if hours else {})
+
+    return restaurants
 
 
 # ============================================================
-# 7. SALVE (lounaat.info)
-# Rakenne: .menu-item -> p.price, p.dish, p.info
-# Salve nayttaa koko viikon - parsitaan vain tanaan paiva
+# APUFUNKTIOT
 # ============================================================
 
-def fetch_salve():
-    """Hakee Salven paivan lounaslistanlounaat.info address-hausta."""
-    # Kaytamme address-hakua joka nayttaa vain tanaan paivan menun
-    url = "https://www.lounaat.info/ruoholahdenkatu-21-helsinki"
+# Viikkoindeksi: (ravintola, ISO-vuosi, ISO-viikko) -> {"days": {paiva: [ruoat]}, "info": {}, "fetched": ts}
+# Sivut sisaltavat koko viikon, joten sivu haetaan ja parsitaan kerran ja kaikki
+# viikon paivat vastataan indeksista. Puuttuva paiva (ravintola julkaisee myohaan)
+# haetaan uudelleen aikaisintaan WEEK_INDEX_RETRY_SECONDS kuluttua.
+WEEK_INDEX_DIR = os.environ.get("LOUNAS_WEEK_INDEX_DIR", os.path.join(".cache", "weeks"))
+WEEK_INDEX_RETRY_SECONDS = int(os.environ.get("LOUNAS_WEEK_INDEX_RETRY", "1800"))
+_week_index = {}
 
-    resp = _safe_request(url)
-    if not resp:
-        return _make_result("Salve", "Hietalahdenranta 5, 00120 Helsinki",
-                            "lounaat.info", [], "https://ravintolasalve.fi",
-                            "Ma-Pe 11:00-14:00", "")
 
-    try:
-        soup = BeautifulSoup(resp.text, "html.parser")
-        menu_items = []
+def _week_index_path(key, year, week):
+    return os.path.join(WEEK_INDEX_DIR, f"{key.lower()}-{year}-W{week:02d}.json")
 
-        # Etsi Salve-ravintola lounaat.info:n tuloksista
-        for item in soup.select(".menu"):
-            name_el = item.select_one(".item-header h3 a")
-            if not name_el:
-                continue
-            name = name_el.get_text(strip=True).lower()
-            if "salve" not in name:
-                continue
 
-            # Loydetty Salve - parsitaan menu
-            for li in item.select(".item-body .menu-item"):
-                price_el = li.select_one("p.price")
-                dish_el = li.select_one("p.dish")
-                info_el = li.select_one("p.info")
+def _load_week(key, year, week):
+    entry = _week_index.get((key, year, week))
+    if entry is not None or not WEEK_INDEX_DIR:
+        return entry
+    try:
+        with open(_week_index_path(key, year, week), "rb") as f:
+            raw = models.loads(f.read())
+        if raw.get("diet_version") != diets.VERSION:
+            return None  # merkitty vanhalla tunnistuksella, haetaan uudelleen
+        entry = {
+            "days": {int(d): models.menu_items(diets.tag(items)) for d, items in raw["days"].items()},
+            "info": raw.get("info", {}),
+            "fetched": raw["fetched"],
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+    _week_index[(key, year, week)] = entry
+    return entry
 
-                price = price_el.get_text(strip=True) if price_el else ""
-                dish = dish_el.get_text(strip=True) if dish_el else ""
-                info = ""
-                if info_el:
-                    info = info_el.get_text(strip=True)
-                    info = re.sub(r'\s+', ' ', info).strip()
 
-                food_text = f"{dish} {info}".strip() if dish else info.strip()
-                if food_text and len(food_text) > 3:
-                    menu_items.append({"food": food_text, "price": price})
+def _store_week(key, year, week, entry):
+    _week_index[(key, year, week)] = entry
+    if not WEEK_INDEX_DIR:
+        return
+    path = _week_index_path(key, year, week)
+    try:
+        os.makedirs(WEEK_INDEX_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(models.dumps({**entry, "diet_version": diets.VERSION}))
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Viikkoindeksin tallennus epaonnistui ({path}): {e}")
+
+
+def _week_menu(key, spec, day=None, refresh=False):
+    """
+    Palauttaa (menu_items, info) paivalle `day` ravintolan viikkoindeksista.
+
+    Sivu haetaan vain jos viikolta ei ole indeksia tai pyydetty paiva puuttuu
+    siita ja edellisesta hausta on kulunut WEEK_INDEX_RETRY_SECONDS. refresh
+    hakee tanaan paivan sivun aina uudelleen (TTL tai pakotettu paivitys), jotta
+    kesken viikon korjattu menu paivittyy; ehdollinen GET ja parsinnan muisti
+    tekevat muuttumattomasta sivusta halvan. Tulevien
+    viikkojen paivia ei voi hakea (sivut nayttavat kuluvan viikon). today_only-
+    strategian sivu nayttaa vain tanaan paivan (parse saa viikonpaivan).
+    Palauttaa None jos hakua ei saatu tehtya eika indeksia ole, seka aina kun
+    refresh-haku epaonnistuu: kutsuja (app._refresh_due_restaurants) pitaa
+    silloin viimeisimman toimivan menun, merkitsee sen vanhentuneeksi ja
+    ajoittaa uuden yrityksen backoffilla.
+    """
+    strategy = STRATEGIES[spec["parser"]]
+    today_only = strategy.get("today_only", False)
+    today = _today_finland()
+    day = day or today
+    if day.weekday() >= 5:
+        return [], {}
+
+    year, week, _ = day.isocalendar()
+    entry = _load_week(key, year, week)
+    if entry is not None and not (refresh and day == today):
+        fresh = time.time() - entry["fetched"] < WEEK_INDEX_RETRY_SECONDS
+        if entry["days"].get(day.weekday()) or fresh:
+            return entry["days"].get(day.weekday(), []), entry["info"]
+
+    # Sivulta saa vain kuluvan viikon (tai today_only-sivulta vain tanaan)
+    if (today_only and day != today) or day.isocalendar()[:2] != today.isocalendar()[:2]:
+        return ([], {}) if entry is None else (entry["days"].get(day.weekday(), []), entry["info"])
+
+    args = (today.weekday(),) if today_only else ()
+    parsed = _shared_page(spec["url"], strategy["parse"], args, key)
+    if parsed is None:
+        return None if entry is None or (refresh and day == today) else (entry["days"].get(day.weekday(), []), entry["info"])
+
+    days, info = _select(parsed, spec, strategy)
+    # Ruokavaliomerkinnat poimitaan kerran scrapatessa ja tallennetaan indeksiin
+    days = {weekday: models.menu_items(diets.tag(items)) for weekday, items in days.items()}
+    if today_only and entry is not None:
+        # Sailyta aiemmin kerattyjen paivien menut
+        days = {**entry["days"], **days}
+    entry = {"days": days, "info": info, "fetched": time.time()}
+    _store_week(key, year, week, entry)
+    return days.get(day.weekday(), []), info
+
+
+def _select(parsed, spec, strategy):
+    """Poimii parserin tuloksesta ravintolan (days, info). Listasivulta haetaan nimella spec["match"]."""
+    if strategy.get("listing"):
+        match = spec.get("match", spec["name"]).lower()
+        for name, found in parsed.items():
+            if match in name:
+                return found
+        return {}, {}
+    return parsed if isinstance(parsed, tuple) else (parsed, {})
+
+
+# Saman sivun kayttavat ravintolat jakavat yhden haun ja parsinnan: samanaikaiset
+# kutsujat odottavat ensimmaisen tulosta, ja onnistunut tulos kelpaa muille
+# PAGE_SHARE_SECONDS ajan (yksi paivityskierros).
+PAGE_SHARE_SECONDS = 30
+_pages = {}
+_pages_lock = threading.Lock()
+
+
+def _shared_page(url, parse, args=(), key=""):
+    """
+    Hakee ja parsii sivun kerran kaikille sita kayttaville. Palauttaa parserin
+    tuloksen tai None. Tavut ja parsinta-aika kirjataan mittareihin ravintolalle key.
+    """
+    page = (url, parse.__name__, args)
+    with _pages_lock:
+        flight = _pages.get(page)
+        stale = flight is not None and flight["done"].is_set() and (
+            flight["result"] is None or time.monotonic() - flight["finished"] > PAGE_SHARE_SECONDS)
+        owner = flight is None or stale
+        if owner:
+            flight = {"done": threading.Event(), "result": None, "finished": 0.0}
+            _pages[page] = flight
+
+    if not owner:
+        flight["done"].wait()
+        return flight["result"]
 
-            # Aukioloaika
-            hours_el = item.select_one(".item-header p.lunch")
-            hours = hours_el.get_text(strip=True) if hours_el else "Ma-Pe 11:00-14:00"
+    try:
+        resp = _safe_request(url)
+        if resp:
+            result = "not_modified" if getattr(resp, "from_cache", False) else "ok"
+            metrics.PAGE_FETCHES.inc(restaurant=key, result=result)
+            if result == "ok":
+                metrics.PAGE_BYTES.inc(len(resp.content), restaurant=key)
+            started = time.perf_counter()
+            flight["result"] = _parse_page(resp, parse, *args)
+            metrics.PARSE_SECONDS.observe(time.perf_counter() - started, restaurant=key)
+        else:
+            metrics.PAGE_FETCHES.inc(restaurant=key, result="error")
+    except Exception as e:
+        logger.warning(f"Sivun parsinta epaonnistui ({url}): {e}")
+    finally:
+        flight["finished"] = time.monotonic()
+        flight["done"].set()
+    return flight["result"]
+
+
+# Kunkin parserin tarvitsemat sivun osat: (SoupStrainerin argumentit, vastaava CSS-valitsin).
+# Sisarusrakenteisiin perustuvat parserit (Oasis, Morton, Pantry) saavat kohteet
+# dokumenttijarjestyksessa vierekkaisina, joten find_next_sibling toimii edelleen.
+_PARSE_TARGET_SPECS = {
+    "_parse_oasis": ({"name": ["h3", "ul"]}, "h3, ul"),
+    "_parse_gresa": ({"name": "p"}, "p"),
+    "_parse_halo": ({"name": "p"}, "p"),
+    "_parse_morton": ({"name": "li", "class_": ["fdm-section-header", "fdm-item"]},
+                      "li.fdm-section-header, li.fdm-item"),
+    "_parse_pantry": ({"name": ["h3", "h4", "p"]}, "h3, h4, p"),
+    "_parse_pompier": ({"name": "div", "class_": "fl-accordion-item"}, "div.fl-accordion-item"),
+    "_parse_lounaat": ({"class_": "menu"}, ".menu"),
+}
 
-            return _make_result("Salve", "Hietalahdenranta 5, 00120 Helsinki",
-                                "lounaat.info", menu_items, "https://ravintolasalve.fi",
-                                hours, "")
+# bs4, lxml ja selectolax ladataan vasta ensimmaisessa parsinnassa: web-workeri
+# kaynnistyy nopeammin ja palvelee valimuistista tai tilannevedoksesta ilman niita.
+_HTML_TOOLS = ("BeautifulSoup", "HTML_PARSER", "FastHTMLParser", "PARSE_TARGETS")
+_html = {}
+_html_lock = threading.Lock()
+
+
+def _html_tools():
+    """
+    Palauttaa dictin _HTML_TOOLS-nimille (nakyvat myos moduulin attribuutteina).
+    HTML-parseri on lxml jos asennettu, muuten Pythonin oma html.parser.
+    selectolax (valinnainen) leikkaa sivusta vain parserin tarvitsemat osat ennen BeautifulSoupia.
+    """
+    if _html:
+        return _html
+    with _html_lock:
+        if _html:
+            return _html
+        from bs4 import BeautifulSoup, SoupStrainer
+        try:
+            import lxml  # noqa: F401
+            parser = "lxml"
+        except ImportError:
+            parser = "html.parser"
+        try:
+            from selectolax.lexbor import LexborHTMLParser as fast_parser
+        except ImportError:
+            try:
+                from selectolax.parser import HTMLParser as fast_parser
+            except ImportError:
+                fast_parser = None
+        targets = {name: (SoupStrainer(**kwargs), css) for name, (kwargs, css) in _PARSE_TARGET_SPECS.items()}
+        _html.update(BeautifulSoup=BeautifulSoup, HTML_PARSER=parser,
+                     FastHTMLParser=fast_parser, PARSE_TARGETS=targets)
+    return _html
+
+
+def __getattr__(name):
+    if name in _HTML_TOOLS:
+        return _html_tools()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def make_soup(html, target=None, mode=None):
+    """
+    Rakentaa BeautifulSoup-puun sivusta. target on PARSE_TARGETS-arvo; ilman
+    sita (tai mode="full") parsitaan koko sivu. Selectolaxin ollessa asennettuna
+    kohdeosat leikataan sen C-parserilla ja vain ne parsitaan BeautifulSoupilla.
+    """
+    tools = _html_tools()
+    soup, parser, fast_parser = tools["BeautifulSoup"], tools["HTML_PARSER"], tools["FastHTMLParser"]
+    mode = mode or PARSE_MODE
+    if target is None or mode == "full":
+        return soup(html, parser)
+    strainer, css = target
+    if mode == "auto" and fast_parser is not None:
+        fragments = [node.html for node in fast_parser(html).css(css)]
+        return soup("".join(fragments), parser)
+    return soup(html, parser, parse_only=strainer)
+
+
+def _has_items(parsed):
+    """Loytyiko parsinnassa menuja (listasivulta riittaa yksikin ravintola)."""
+    days = parsed[0] if isinstance(parsed, tuple) else parsed
+    return any(days.values())
+
+
+# Parsittujen sivujen muisti: (parseri, sivun sisallon tiiviste, argumentit) -> tulos.
+# Kun sivu ei ole muuttunut (304 tai sama sisalto), parsintaa ei tehda uudelleen.
+_PARSE_MEMO_MAX = 128
+_parse_memo = {}
+
+
+def _parse_page(resp, parse, *args):
+    """Ajaa parse(soup, *args) tai palauttaa aiemman tuloksen samalle sivuversiolle."""
+    digest = getattr(resp, "cache_digest", None)
+    key = (parse.__name__, digest, args) if digest else None
+    if key is not None and key in _parse_memo:
+        return copy.deepcopy(_parse_memo[key])
+
+    html = resp.text
+    result = parse(make_soup(html, _html_tools()["PARSE_TARGETS"].get(parse.__name__)), *args)
+    if not _has_items(result) and PARSE_MODE != "full":
+        # Kohdistettu parsinta ei loytanyt mitaan - varmistetaan koko sivulla
+        result = parse(make_soup(html, mode="full"), *args)
+
+    if key is not None:
+        if len(_parse_memo) >= _PARSE_MEMO_MAX:
+            _parse_memo.clear()
+        _parse_memo[key] = copy.deepcopy(result)
+    return result
+
+
+def _make_result(name, address, source, menu, url, hours, price_info, failed=False):
+    """
+    failed=True kertoo ettei sivua saatu haettua tai parsittua (vrt. aidosti tyhja lista).
+    Metatieto jaetaan saman ravintolan kaikkien tulosten kesken (ks. models.py).
+    """
+    return models.Restaurant(models.restaurant_info(name, address, source, url, hours, price_info),
+                             models.menu_items(menu), failed)
+
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="scraper")
+# Ajossa olevan fetcherin takaraja (time.monotonic), josta _safe_request laskee aikakatkaisunsa
+_fetch_deadline = threading.local()
+
+
+def _run_fetchers(fetchers, args=(), deadline=None, restaurant_deadline=None):
+    """
+    Ajaa fetcherit rinnakkain jaetussa saikeistossa.
+
+    Koko haulla on yhteinen takaraja ja jokaisella fetcherilla oma takaraja,
+    joka lasketaan siita hetkesta kun fetcher paasee ajoon. Myohastyneiden ja
+    kaatuneiden fetchereiden paikalle tulee None ja myohastyneiden nimet
+    palautetaan erikseen, jotta sivu ei jaa odottamaan hidasta sivustoa.
+
+    Jo ajossa olevaa saietta ei voi keskeyttaa, joten fetcherin HTTP-pyynnot
+    saavat aikakatkaisunsa sen omasta takarajasta (ks. _request_timeout) ja
+    takarajan jalkeen pyyntoja ei enaa aloiteta. Myohastynyt fetcher pitaa
+    saikeiston paikkaa siis enintaan noin takarajansa verran (lisaksi
+    uudelleenyritysten backoff), eika se vie paikkoja seuraavalta haulta.
+
+    Palauttaa (tulokset alkuperaisessa jarjestyksessa, myohastyneiden nimet).
+    """
+    deadline = FETCH_DEADLINE_SECONDS if deadline is None else deadline
+    restaurant_deadline = RESTAURANT_DEADLINE_SECONDS if restaurant_deadline is None else restaurant_deadline
+
+    start = time.monotonic()
+    started = {}
+
+    def run(idx, fetcher):
+        started[idx] = time.monotonic()
+        _fetch_deadline.at = min(started[idx] + restaurant_deadline, start + deadline)
+        try:
+            return fetcher(*args)
+        finally:
+            _fetch_deadline.at = None
+
+    futures = {_executor.submit(run, idx, f): idx for idx, f in enumerate(fetchers)}
+    pending = set(futures)
+    timed_out = set()
+
+    while pending:
+        now = time.monotonic()
+        if now - start >= deadline:
+            timed_out.update(futures[f] for f in pending)
+            break
+
+        expired = {f for f in pending
+                   if futures[f] in started and now - started[futures[f]] >= restaurant_deadline}
+        timed_out.update(futures[f] for f in expired)
+        pending -= expired
+        if not pending:
+            break
+
+        next_deadline = start + deadline
+        for f in pending:
+            idx = futures[f]
+            if idx in started:
+                next_deadline = min(next_deadline, started[idx] + restaurant_deadline)
+        _, pending = wait(pending, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+    results = [None] * len(fetchers)
+    for f, idx in futures.items():
+        if idx in timed_out:
+            f.cancel()
+            continue
+        try:
+            results[idx] = f.result() or None
+        except Exception as e:
+            logger.error(f"Ravintolan haku epaonnistui: {e}")
 
-        # Salve ei loytynyt hausta
-        return _make_result("Salve", "Hietalahdenranta 5, 00120 Helsinki",
-                            "lounaat.info", [], "https://ravintolasalve.fi",
-                            "Ma-Pe 11:00-14:00", "")
-    except Exception as e:
-        logger.warning(f"Salve parsinta epaonnistui: {e}")
-        return _make_result("Salve", "Hietalahdenranta 5, 00120 Helsinki",
-                            "lounaat.info", [], "https://ravintolasalve.fi",
-                            "Ma-Pe 11:00-14:00", "")
+    names = [getattr(fetchers[idx], "__name__", str(idx)) for idx in sorted(timed_out)]
+    if names:
+        logger.warning(f"Takaraja ylittyi, osittainen tulos: {', '.join(names)}")
+    return results, names
 
 
 # ============================================================
-# APUFUNKTIOT
+# RAVINTOLAREKISTERI
+# Ravintolat maaritellaan restaurants.json-tiedostossa (tai LOUNAS_RESTAURANTS_FILE):
+# nimi, osoite, sivun url, parseristrategia seka naytettavat tiedot. Uusi
+# ravintola jo tuetulla sivurakenteella ei vaadi koodia. Kaikki ravintolat
+# ajetaan samalla moottorilla (fetch_restaurant); saman sivun kayttavat
+# ravintolat jakavat yhden haun (_shared_page).
 # ============================================================
 
-def _make_result(name, address, source, menu, url, hours, price_info):
-    return {
-        "name": name,
-        "address": address,
-        "source": source,
-        "menu": menu,
-        "url": url,
-        "hours": hours,
-        "price_info": price_info,
-    }
-
+# Parseristrategia -> parseri. today_only: sivu nayttaa vain tanaan paivan;
+# listing: sivulla on useita ravintoloita, joista valitaan "match"-nimella.
+STRATEGIES = {
+    "nordrest-lunch-list": {"parse": _parse_oasis},
+    "nordrest-paragraphs": {"parse": _parse_gresa},
+    "dated-paragraphs": {"parse": _parse_halo},
+    "fdm-sections": {"parse": _parse_morton},
+    "day-categories": {"parse": _parse_pantry},
+    "accordion": {"parse": _parse_pompier},
+    "lounaat.info": {"parse": _parse_lounaat, "today_only": True, "listing": True},
+}
 
-def fetch_all_restaurants():
-    """Hakee kaikkien 7 ravintolan paivan lounaslistat."""
-    today = _today_finland()
+RESTAURANTS_FILE = os.environ.get(
+    "LOUNAS_RESTAURANTS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "restaurants.json"))
+
+# Pakolliset kentat; link (oletus url), match (listasivut) ja hours/price_info ovat valinnaisia
+REQUIRED_FIELDS = ("name", "address", "source", "url", "parser")
+
+
+def load_registry(path=RESTAURANTS_FILE):
+    """
+    Lukee ravintolat ja sijainnit tiedostosta: ({avain: maaritys}, {sijainti: maaritys}).
+    Virheelliset maaritykset ohitetaan. Ilman locations-osiota kaikki ravintolat
+    kuuluvat yhteen sijaintiin "default".
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    restaurants = {}
+    for key, spec in config["restaurants"].items():
+        missing = [field for field in REQUIRED_FIELDS if not spec.get(field)]
+        if missing:
+            logger.error(f"Ravintola {key}: puuttuvat kentat {', '.join(missing)}, ohitetaan")
+            continue
+        if spec["parser"] not in STRATEGIES:
+            logger.error(f"Ravintola {key}: tuntematon parseri '{spec['parser']}', ohitetaan")
+            continue
+        restaurants[key] = spec
+
+    locations = {}
+    for key, spec in config.get("locations", {"default": {"name": ""}}).items():
+        keys = spec.get("restaurants", list(restaurants))
+        unknown = [k for k in keys if k not in restaurants]
+        if unknown:
+            logger.error(f"Sijainti {key}: tuntemattomat ravintolat {', '.join(unknown)}, ohitetaan ne")
+        locations[key] = dict(spec, restaurants=[k for k in keys if k in restaurants])
+    return restaurants, locations
+
+
+RESTAURANTS, LOCATIONS = load_registry()
+DEFAULT_LOCATION = next(iter(LOCATIONS))
+
+
+def _registry_result(key, found):
+    """Rekisterin ravintolan tulos _week_menun palauttamasta (menu_items, info) -parista (None = haku epaonnistui)."""
+    spec = RESTAURANTS[key]
+    menu_items, info = found if found else ([], {})
+    return _make_result(spec["name"], spec["address"], spec["source"], menu_items,
+                        spec.get("link", spec["url"]), info.get("hours") or spec.get("hours", ""),
+                        spec.get("price_info", ""), failed=found is None)
+
+
+def fetch_restaurant(key, day=None, refresh=False):
+    """
+    Hakee rekisterin ravintolan `key` lounaslistan paivalle `day` (oletus tanaan).
+    refresh hakee tanaan paivan sivun uudelleen, vaikka se olisi jo viikkoindeksissa.
+    """
+    started = time.perf_counter()
+    found = _week_menu(key, RESTAURANTS[key], day, refresh)
+    metrics.RESTAURANT_FETCH_SECONDS.observe(time.perf_counter() - started, restaurant=key)
+    metrics.RESTAURANT_ITEMS.set(len(found[0]) if found else 0, restaurant=key)
+    if found is None:
+        metrics.RESTAURANT_FAILURES.inc(restaurant=key)
+    return _registry_result(key, found)
+
+
+def _fetcher(key):
+    def fetch(day=None, refresh=False):
+        return fetch_restaurant(key, day, refresh)
+    fetch.__name__ = f"fetch_{key}"
+    return fetch
+
+
+FETCHERS = {key: _fetcher(key) for key in RESTAURANTS}
+
+
+def location_keys(locations=None):
+    """Sijaintien ravintolat yhdistettyna, kukin kerran (None = kaikki ravintolat)."""
+    if locations is None:
+        return list(RESTAURANTS)
+    keys = {}
+    for location in locations:
+        keys.update(dict.fromkeys(LOCATIONS[location]["restaurants"]))
+    return list(keys)
+
+
+def plan_fetch(keys):
+    """
+    Hakusuunnitelma: ravintolat ryhmiteltyna lahdesivun mukaan [(url, [avaimet])].
+    Jokainen ryhma ajetaan yhtena tehtavana, joten sivu haetaan ja parsitaan
+    kerran vaikka sita kayttaisi moni ravintola tai sijainti.
+    """
+    groups = {}
+    for key in keys:
+        groups.setdefault(RESTAURANTS[key]["url"], []).append(key)
+    return list(groups.items())
+
+
+def _group_fetcher(keys):
+    def fetch(day=None, refresh=False):
+        return {key: FETCHERS[key](day, refresh) for key in keys}
+    fetch.__name__ = "+".join(f"fetch_{key}" for key in keys)
+    return fetch
+
+
+def fetch_restaurants(keys=None, day=None, refresh=False):
+    """
+    Hakee valitut ravintolat (FETCHERS-avaimet) rinnakkain paivalle `day`
+    hakusuunnitelman mukaan (ks. plan_fetch). refresh ohittaa viikkoindeksin
+    tanaan paivalle (ks. _week_menu).
+    Palauttaa {avain: tulos tai None jos haku myohastyi tai kaatui}.
+    """
+    keys = list(FETCHERS) if keys is None else list(keys)
+    plan = plan_fetch(keys)
+    results, _ = _run_fetchers([_group_fetcher(group) for _, group in plan],
+                               args=(day or _today_finland(), refresh))
+    found = {}
+    for (_, group), result in zip(plan, results):
+        for key in group:
+            found[key] = result.get(key) if result else None
+    return {key: found[key] for key in keys}
+
+
+def make_payload(restaurants, day=None, partial=False, location=None):
+    """Kokoaa sivulle ja API:lle menevan datan ravintolatuloksista (location = sijainnin avain)."""
+    day = day or _today_finland()
     now_fi = datetime.now(FINLAND_TZ)
 
-    if today.weekday() >= 5:
-        return {
+    if day.weekday() >= 5:
+        payload = {
             "restaurants": [],
-            "date": today.strftime("%d.%m.%Y"),
-            "weekday": get_today_weekday_fi(),
+            "date": day.strftime("%d.%m.%Y"),
+            "weekday": WEEKDAYS_FI[day.weekday()],
             "fetch_time": now_fi.strftime("%H:%M"),
             "message": "Viikonloppuna ei lounaslistoja saatavilla. Tule takaisin maanantaina!",
         }
-
-    fetchers = [
-        fetch_oasis,
-        fetch_gresa,
-        fetch_halo,
-        fetch_morton,
-        fetch_pantry,
-        fetch_pompier,
-        fetch_salve,
-    ]
-
+    else:
+        message = None
+        if partial:
+            message = "Osa ravintoloista ei vastannut ajoissa - yrita hetken kuluttua uudelleen."
+
+        payload = {
+            "restaurants": restaurants,
+            "date": day.strftime("%d.%m.%Y"),
+            "weekday": WEEKDAYS_FI[day.weekday()],
+            "fetch_time": now_fi.strftime("%H:%M"),
+            "message": message,
+            "partial": partial,
+        }
+    if location is not None:
+        payload["location"] = {"key": location, "name": LOCATIONS[location].get("name", "")}
+    return payload
+
+
+def fetch_all_restaurants(day=None, location=None):
+    """
+    Hakee sijainnin (oletus: kaikki rekisterin ravintolat) lounaslistat paivalle
+    `day` (oletus tanaan). Kuluvan viikon muut paivat vastataan viikkoindeksista
+    ilman uutta hakua.
+    """
+    day = day or _today_finland()
+    if day.weekday() >= 5:
+        return make_payload([], day, location=location)
+
+    results = fetch_restaurants(location_keys(None if location is None else [location]), day)
+    restaurants = [r for r in results.values() if r]
+    return make_payload(restaurants, day, partial=len(restaurants) < len(results), location=location)
+
+
+def indexed_restaurants(day, location=None):
+    """
+    Kuten fetch_all_restaurants, mutta vastataan pelkasta viikkoindeksista
+    ilman hakuja: muiden paivien pyynnot eivat ohita valimuistia, single-flightia
+    eivatka backoffia. Ravintola jota indeksissa ei ole saa tyhjan menun.
+    """
+    if day.weekday() >= 5:
+        return make_payload([], day, location=location)
     restaurants = []
-    for fetcher in fetchers:
-        try:
-            result = fetcher()
-            if result:
-                restaurants.append(result)
-        except Exception as e:
-            logger.error(f"Ravintolan haku epaonnistui: {e}")
-
-    return {
-        "restaurants": restaurants,
-        "date": today.strftime("%d.%m.%Y"),
-        "weekday": get_today_weekday_fi(),
-        "fetch_time": now_fi.strftime("%H:%M"),
-        "message": None,
-    }
+    for key in location_keys(None if location is None else [location]):
+        year, week, _ = day.isocalendar()
+        entry = _load_week(key, year, week)
+        found = (entry["days"].get(day.weekday(), []), entry["info"]) if entry else ([], {})
+        restaurants.append(_registry_result(key, found))
+    return make_payload(restaurants, day, location=location)
 
 
 if __name__ == "__main__":
     import sys
+    if sys.argv[1:2] == ["export"]:
+        # Staattinen vienti (ks. export.py)
+        import export
+        sys.exit(export.main(sys.argv[2:]))
     sys.stdout.reconfigure(encoding="utf-8")
-    print("Haetaan Ruoholahden lounaslistat (7 ravintolaa)...\n")
+    print(f"Haetaan Ruoholahden lounaslistat ({len(RESTAURANTS)} ravintolaa)...\n")
     result = fetch_all_restaurants()
     print(f"Paiva: {result['weekday']} {result['date']}")
     print(f"Haettu klo {result['fetch_time']}")
@@ -0,0 +1,172 @@
+"""
+Ruoholahden Lounas - Ruokahaku
+Kaanteinen indeksi menuriveista. Jokainen rivi (paiva, ravintola, ruoka) on
+dokumentti, jonka sanat normalisoidaan: pienet kirjaimet, diakriitit pois
+(ä/ö/å -> a/o/a) ja kaikki muu kuin kirjaimet ja numerot erottimiksi.
+
+Hakusana osuu sanaan, joka sisaltaa sen: "keitto" loytaa "keittoa" (alku) ja
+"hernekeitto" (yhdyssanan loppuosa). Tata varten jokaisen sanan loppuosat
+(vahintaan MIN_SUFFIX merkkia) pidetaan jarjestetyssa listassa, josta
+hakusanan alkuiset loytyvat puolitushaulla. Termin osumat kootaan
+bittijoukoksi (int), joka pidetaan muistissa seuraavaan muutokseen asti;
+useampi hakusana = bittijoukkojen leikkaus.
+
+Indeksia paivitetaan paiva ja ravintola kerrallaan (replace), joten scrapaus
+maksaa vain muuttuneiden rivien verran.
+"""
+
+import re
+import bisect
+import threading
+import unicodedata
+
+MIN_SUFFIX = 3
+TERM_CACHE_SIZE = 1024
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """"Kasvispyörykät" -> "kasvispyorykat" (pienet kirjaimet, ei diakriitteja)."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def _suffixes(token):
+    yield token
+    for i in range(1, len(token) - MIN_SUFFIX + 1):
+        yield token[i:]
+
+
+class SearchIndex:
+    """Kaanteinen indeksi: sana -> dokumentit, loppuosa -> sanat."""
+
+    def __init__(self):
+        self._docs = {}       # id -> (paiva, avain, nimi, ruoka, sanat)
+        self._slots = {}      # (paiva, avain) -> [id]
+        self._day_keys = {}   # paiva -> {avain}
+        self._postings = {}   # sana -> {id}
+        self._suffix_map = {}  # loppuosa -> {sana}
+        self._sorted = []     # jarjestetyt loppuosat puolitushakua varten
+        self._dirty = False
+        self._term_cache = {}  # hakutermi -> osumien bittijoukko, tyhjennetaan muutoksissa
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add_token(self, token, doc_id):
+        ids = self._postings.get(token)
+        if ids is None:
+            ids = self._postings[token] = set()
+            for suffix in _suffixes(token):
+                self._suffix_map.setdefault(suffix, set()).add(token)
+            self._dirty = True
+        ids.add(doc_id)
+
+    def _remove_token(self, token, doc_id):
+        ids = self._postings[token]
+        ids.discard(doc_id)
+        if ids:
+            return
+        del self._postings[token]
+        for suffix in _suffixes(token):
+            tokens = self._suffix_map[suffix]
+            tokens.discard(token)
+            if not tokens:
+                del self._suffix_map[suffix]
+        self._dirty = True
+
+    def _replace(self, day, key, name, menu):
+        self._term_cache.clear()
+        for doc_id in self._slots.pop((day, key), ()):
+            for token in self._docs.pop(doc_id)[4]:
+                self._remove_token(token, doc_id)
+        self._day_keys.get(day, set()).discard(key)
+        ids = []
+        name_tokens = set(tokenize(name))
+        for item in menu:
+            doc_id = self._next_id
+            self._next_id += 1
+            tokens = frozenset(name_tokens.union(tokenize(item["food"])))
+            self._docs[doc_id] = (day, key, name, item["food"], tokens)
+            for token in tokens:
+                self._add_token(token, doc_id)
+            ids.append(doc_id)
+        if ids:
+            self._slots[(day, key)] = ids
+            self._day_keys.setdefault(day, set()).add(key)
+        elif not self._day_keys.get(day, True):
+            del self._day_keys[day]
+
+    def replace(self, day, key, name, menu):
+        """Korvaa ravintolan key rivit paivalle day (ISO-merkkijono) menun riveilla."""
+        with self._lock:
+            self._replace(day, key, name, menu)
+
+    def replace_day(self, day, restaurants):
+        """Korvaa paivan kaikki ravintolat: restaurants = [{"key", "name", "menu"}]."""
+        keep = {r["key"] for r in restaurants}
+        with self._lock:
+            for key in list(self._day_keys.get(day, ())):
+                if key not in keep:
+                    self._replace(day, key, "", [])
+            for r in restaurants:
+                self._replace(day, r["key"], r["name"], r["menu"])
+
+    def _term_bits(self, term):
+        """Bittijoukko (int) dokumenteista, joiden jokin sana sisaltaa termin."""
+        bits = self._term_cache.get(term)
+        if bits is not None:
+            return bits
+        if self._dirty:
+            self._sorted = sorted(self._suffix_map)
+            self._dirty = False
+        mask = bytearray((self._next_id >> 3) + 1)
+        i = bisect.bisect_left(self._sorted, term)
+        while i < len(self._sorted) and self._sorted[i].startswith(term):
+            for token in self._suffix_map[self._sorted[i]]:
+                for doc_id in self._postings[token]:
+                    mask[doc_id >> 3] |= 1 << (doc_id & 7)
+            i += 1
+        bits = int.from_bytes(mask, "little")
+        if len(self._term_cache) >= TERM_CACHE_SIZE:
+            self._term_cache.clear()
+        self._term_cache[term] = bits
+        return bits
+
+    def search(self, query, day=None, limit=50):
+        """
+        Palauttaa rivit joihin kaikki hakusanat osuvat, uusin paiva ensin:
+        [{"date", "restaurant", "name", "food"}]. day rajaa yhteen paivaan.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            bits = -1
+            for term in terms:
+                bits &= self._term_bits(term)
+                if not bits:
+                    return []
+            if day is not None:
+                ids = [doc_id for key in self._day_keys.get(day, ())
+                       for doc_id in self._slots[(day, key)] if bits >> doc_id & 1]
+            else:
+                # Rivit lisataan paiva kerrallaan vanhimmasta uusimpaan, joten
+                # suurimmat tunnisteet ovat uusimpia paivia
+                ids = []
+                while bits and len(ids) < limit:
+                    doc_id = bits.bit_length() - 1
+                    bits ^= 1 << doc_id
+                    ids.append(doc_id)
+            docs = [(doc_id, self._docs[doc_id]) for doc_id in ids]
+        # Uusin paiva ensin, paivan sisalla ravintoloittain menun jarjestyksessa
+        docs.sort(key=lambda pair: (pair[1][1], pair[0]))
+        docs.sort(key=lambda pair: pair[1][0], reverse=True)
+        return [{"date": d, "restaurant": k, "name": n, "food": f} for _, (d, k, n, f, _) in docs[:limit]]
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sovellus ajetaan eristettyna kuten loadtest.py:ssa: muistivalimuisti, ei
+# historiaa, levyvalimuisteja, vedosta eika ajastinta
+os.environ.update({
+    "LOUNAS_CACHE_BACKEND": "memory",
+    "LOUNAS_HISTORY_PATH": "",
+    "LOUNAS_HTTP_CACHE_DIR": "",
+    "LOUNAS_WEEK_INDEX_DIR": "",
+    "LOUNAS_SCHEDULER": "0",
+    "LOUNAS_SNAPSHOT_PATH": "",
+})
+
+import pytest
+
+
+@pytest.fixture
+def web():
+    """app-moduuli tyhjin valimuistein (vrt. loadtest.reset_app)."""
+    import app
+    import cache_backend
+    import scrapers
+
+    app._cache = cache_backend.MemoryBackend()
+    app._entry_memo.clear()
+    app._rendered.clear()
+    app._live_seen.clear()
+    app._live_events.clear()
+    scrapers._week_index.clear()
+    scrapers._pages.clear()
+    scrapers._parse_memo.clear()
+    return app
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from datetime import date
+
+import pytest
+
+import scrapers
+
+
+def _payload(food):
+    result = scrapers._make_result("Oasis", "Ruoholahdenkatu 21", "nordrest.fi", [{"food": food}],
+                                   "https://example.test/oasis", "10:30-13:30", "12,70 EUR")
+    return scrapers.make_payload([result], day=date(2026, 10, 15))
+
+
+@pytest.fixture
+def asgi(web, monkeypatch):
+    import asgi
+
+    monkeypatch.setattr(web, "LIVE_POLL_SECONDS", 0.05)
+    asgi._watchers.clear()
+    asgi._changes.clear()
+    return asgi
+
+
+def _scope(path, query=b""):
+    return {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []}
+
+
+async def _stream(asgi, web, scope, messages):
+    """Avaa striimin, vaihtaa datan striimin ollessa auki ja katkaisee yhteyden."""
+    disconnect = asyncio.Event()
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if b"event: menu" in message.get("body", b""):
+            disconnect.set()
+
+    task = asyncio.ensure_future(asgi.app(scope, receive, send))
+    await asyncio.sleep(0.2)
+    assert not task.done()
+    await asyncio.to_thread(web._store_entry, scrapers.DEFAULT_LOCATION, _payload("Lohikeitto"), time.time() + 60)
+    await asyncio.wait_for(task, 5)
+
+
+@pytest.mark.parametrize("query", [b"", b"day=2026-01-05&diet=tuntematon"])
+def test_events_stream_stays_open_and_pushes_changes(asgi, web, query):
+    first = web._store_entry(scrapers.DEFAULT_LOCATION, _payload("Hernekeitto"), time.time() + 60)
+    assert asgi._native_route(_scope("/api/events", query))[1] == "events"
+
+    messages = []
+    scope = _scope("/api/events", query + b"&since=" + first["generation"].encode())
+    asyncio.run(_stream(asgi, web, scope, messages))
+
+    assert messages[0]["status"] == 200
+    bodies = [m.get("body", b"") for m in messages[1:]]
+    assert bodies[0].startswith(b"retry:")
+    assert any(b"Lohikeitto" in body for body in bodies)
+    assert messages[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
@@ -0,0 +1,45 @@
+import json
+import os
+
+import bench
+
+
+def test_compare_flags_slower_and_lower_throughput():
+    baseline = {"hot /": {"p50_ms": 10.0, "rps": 1000.0}, "cold /": {"p50_ms": 100.0, "rps": 50.0}}
+    results = {"hot /": {"p50_ms": 20.0, "rps": 900.0}, "cold /": {"p50_ms": 120.0, "rps": 20.0}}
+    regressions = bench.compare(results, baseline, 0.5, lower=("p50_ms",), higher=("rps",))
+    assert regressions == [("hot /", "p50_ms", 10.0, 20.0), ("cold /", "rps", 50.0, 20.0)]
+
+
+def test_compare_ignores_growth_below_floor():
+    baseline = {"cold /refresh": {"p99_ms": 20.0}}
+    results = {"cold /refresh": {"p99_ms": 60.0}}
+    assert bench.compare(results, baseline, 0.5, lower=("p99_ms",), floors={"p99_ms": 50.0}) == []
+    assert bench.compare(results, baseline, 0.5, lower=("p99_ms",))
+
+
+def test_save_and_compare_round_trip(tmp_path, capsys):
+    results = {"oasis": {"parse_ms": 1.0, "e2e_ms": 2.0, "alloc_kib": 3.0}}
+    path = tmp_path / "perus.json"
+    assert bench.save_and_compare(results, str(path), "", 0.5) == 0
+    assert json.loads(path.read_text()) == results
+
+    slower = {"oasis": dict(results["oasis"], e2e_ms=4.0)}
+    assert bench.save_and_compare(slower, None, str(path), 0.5) == 1
+    assert "oasis e2e_ms" in capsys.readouterr().out
+
+
+def test_committed_baselines_exist():
+    for name in ("scrapers.json", "loadtest.json"):
+        with open(os.path.join(bench.BASELINES_DIR, name), encoding="utf-8") as f:
+            assert json.load(f)
+
+
+def test_synthetic_fixtures_are_flagged(tmp_path, capsys):
+    (tmp_path / bench.MANIFEST).write_text(json.dumps({
+        "oasis": {"url": "https://example.test/", "synthetic": True},
+        "gresa": {"url": "https://example.test/", "recorded": "2026-10-16T10:00:00+03:00"},
+    }))
+    assert bench.synthetic_keys(str(tmp_path)) == ["oasis"]
+    bench.warn_synthetic(str(tmp_path))
+    assert "synteettiset sivut" in capsys.readouterr().out
@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+import cache_backend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return cache_backend.MemoryBackend()
+    return cache_backend.SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+
+
+def _lock_names(backend):
+    if isinstance(backend, cache_backend.MemoryBackend):
+        return set(backend._locks)
+    return {row[0] for row in backend._conn().execute("SELECT name FROM locks")}
+
+
+def test_lock_is_exclusive_until_released(backend):
+    owner = backend.acquire("refresh", 60)
+    assert owner is not None
+    assert backend.acquire("refresh", 60) is None
+    backend.release("refresh", owner)
+    assert backend.acquire("refresh", 60) is not None
+
+
+def test_acquire_prunes_expired_locks(backend, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    for slot in ("10:00", "10:30", "11:00"):
+        assert backend.acquire(f"prewarm:2026-10-15T{slot}", 300) is not None
+    now[0] += 301
+    assert backend.acquire("prewarm:2026-10-16T10:00", 300) is not None
+    assert _lock_names(backend) == {"prewarm:2026-10-16T10:00"}
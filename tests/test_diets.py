@@ -0,0 +1,60 @@
+import pytest
+
+import diets
+
+L, G, M, VL, VE = (diets.BITS[tag] for tag in diets.TAGS)
+
+
+@pytest.mark.parametrize("text, bits", [
+    ("Lohikeitto L, G", L | G),
+    ("Kalaa ja perunaa M", M | L),
+    ("Broileria VE", VE | M | L),
+    ("Keitto VL/G.", VL | G),
+    ("Salaatti (M, VE) ja leipää", VE | M | L),
+    ("Burger - laktoositon nauta", L),
+    ("Kasvispata, gluteeniton", G),
+])
+def test_extract_markers_and_words(text, bits):
+    assert diets.extract(text) == bits
+
+
+@pytest.mark.parametrize("text", [
+    "Curry - saatavana vegaanisena",
+    "Pasta - saatavana gluteenittomana +2€",
+    "Pizza (saatavilla myös gluteenittomana)",
+    "Pasta, gluten-free on request",
+    "Lasagne, G pyydettäessä",
+])
+def test_extract_ignores_on_request_options(text):
+    assert diets.extract(text) == 0
+
+
+def test_extract_keeps_markers_outside_on_request_clause():
+    assert diets.extract("Curry (saatavana vegaanisena), laktoositon") == L
+
+
+@pytest.mark.parametrize("text", [
+    "Kana M-kastike",
+    "Broileria ja L-kokoinen salaatti",
+    "G-piste pizza",
+    "Makkarat M ja muusi",
+])
+def test_extract_ignores_single_letters_inside_text(text):
+    assert diets.extract(text) == 0
+
+
+def test_parse():
+    assert diets.parse("G,VE") == G | VE
+    assert diets.parse("gluteeniton") == G
+    assert diets.parse("") == 0
+    assert diets.parse("X") is None
+
+
+def test_filter_payload_requires_all_bits():
+    data = {"restaurants": [
+        {"name": "A", "menu": [{"food": "a", "diet": L | G}, {"food": "b", "diet": L}]},
+        {"name": "B", "menu": [{"food": "c", "diet": M}]},
+    ]}
+    filtered = diets.filter_payload(data, L | G)
+    assert [(r["name"], [i["food"] for i in r["menu"]]) for r in filtered["restaurants"]] == [("A", ["a"])]
+    assert filtered["diet"] == ["L", "G"]
@@ -0,0 +1,46 @@
+import os
+import time
+from datetime import date
+
+import pytest
+
+import scrapers
+
+
+def _entries(web, food, fetch_time):
+    result = scrapers._make_result("Oasis", "Ruoholahdenkatu 21", "nordrest.fi", [{"food": food}],
+                                   "https://example.test/oasis", "10:30-13:30", "12,70 EUR")
+    entries = {}
+    for location in scrapers.LOCATIONS:
+        data = dict(scrapers.make_payload([result], day=date(2026, 10, 15), location=location), fetch_time=fetch_time)
+        entries[location] = web._store_entry(location, data, time.time() + 60)
+    return entries
+
+
+@pytest.fixture
+def export(web, monkeypatch):
+    import export
+
+    state = {}
+    monkeypatch.setattr(web, "_refresh_entries", lambda force, locations: state["entries"])
+    return export, state
+
+
+def test_export_publishes_only_when_content_changes(web, export, tmp_path):
+    export, state = export
+    root = str(tmp_path)
+
+    state["entries"] = _entries(web, "Hernekeitto", "10:00")
+    first, created = export.export(root)
+    assert created
+
+    # Vain hakuaika muuttui: ei uutta versiota
+    state["entries"] = _entries(web, "Hernekeitto", "10:30")
+    assert export.export(root) == (first, False)
+
+    state["entries"] = _entries(web, "Lohikeitto", "11:00")
+    second, created = export.export(root)
+    assert created and second != first
+    assert export.current_version(root) == second
+    with open(os.path.join(root, "current", "index.html"), encoding="utf-8") as f:
+        assert "Lohikeitto" in f.read()
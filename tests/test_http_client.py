@@ -0,0 +1,51 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+
+BODY = "<html>Hernekeitto</html>".encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_client, "CACHE_DIR", str(tmp_path))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.seen = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_not_modified_reuses_cached_body(server):
+    url = f"http://127.0.0.1:{server.server_port}/lounas"
+    first = http_client.get(url)
+    assert not first.from_cache and first.content == BODY
+
+    second = http_client.get(url)
+    assert server.seen == [None, '"v1"']
+    assert second.from_cache and second.status_code == 200
+    assert second.content == BODY and second.text == first.text
+    assert second.cache_digest == first.cache_digest
+    assert http_client.host_stats()[f"127.0.0.1:{server.server_port}"]["not_modified"] == 1
@@ -0,0 +1,206 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+
+import scrapers
+
+TODAY = date(2026, 10, 15)  # torstai
+
+
+class Upstream:
+    """fetch_restaurants-korvike: failing-ravintolat epaonnistuvat, muut saavat menun."""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+        self.food = "Hernekeitto"
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, keys=None, day=None, refresh=False):
+        self.calls.append(list(keys))
+        self.gate.wait(5)
+        return {key: scrapers._registry_result(key, None if key in self.failing else ([{"food": self.food}], {}))
+                for key in keys}
+
+
+@pytest.fixture
+def upstream(web, monkeypatch):
+    monkeypatch.setattr(scrapers, "_today_finland", lambda: TODAY)
+    fake = Upstream()
+    monkeypatch.setattr(web, "fetch_restaurants", fake)
+    return fake
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def _refresh(web, force=False):
+    (data, expires), = web._refresh_due_restaurants(force).values()
+    return {r["name"]: r for r in data["restaurants"]}, expires
+
+
+def _entry(web, key):
+    return web._cache.get(web.RESTAURANT_KEY_PREFIX + key)
+
+
+def test_fresh_restaurants_are_not_refetched_until_ttl(web, upstream, clock):
+    keys = web.location_keys([web.DEFAULT_LOCATION])
+    restaurants, expires = _refresh(web)
+    assert upstream.calls == [keys]
+    assert all(_entry(web, key)["ok"] for key in keys)
+    assert expires == clock[0] + web.RESTAURANT_TTL_SECONDS
+
+    clock[0] += web.RESTAURANT_TTL_SECONDS - 1
+    _refresh(web)
+    assert len(upstream.calls) == 1
+
+    clock[0] += 1
+    _refresh(web)
+    assert upstream.calls[-1] == keys
+
+
+def test_failure_keeps_last_menu_and_backs_off_until_recovery(web, upstream, clock):
+    name = scrapers.RESTAURANTS["oasis"]["name"]
+    _refresh(web)
+    upstream.failing = {"oasis"}
+
+    # Epaonnistunut haku: viimeisin menu vanhentuneena ja backoff
+    clock[0] += web.RESTAURANT_TTL_SECONDS
+    restaurants, expires = _refresh(web, force=True)
+    entry = _entry(web, "oasis")
+    assert (entry["ok"], entry["failures"], entry["retry_at"]) == (False, 1, clock[0] + web.FAILURE_BACKOFF_SECONDS)
+    assert restaurants[name]["stale"] and restaurants[name]["menu"][0]["food"] == "Hernekeitto"
+    assert expires == entry["retry_at"]
+
+    # Backoffin aikana ravintolaa ei haeta, vaikka paivitys pakotetaan
+    clock[0] += web.FAILURE_BACKOFF_SECONDS - 1
+    _refresh(web, force=True)
+    assert "oasis" not in upstream.calls[-1]
+
+    # Uusi epaonnistuminen kaksinkertaistaa viiveen
+    clock[0] += 1
+    _refresh(web)
+    assert upstream.calls[-1] == ["oasis"]
+    entry = _entry(web, "oasis")
+    assert (entry["failures"], entry["retry_at"]) == (2, clock[0] + 2 * web.FAILURE_BACKOFF_SECONDS)
+
+    # Toipuminen nollaa tilan ja tuo uuden menun
+    upstream.failing = set()
+    upstream.food = "Lohikeitto"
+    clock[0] = entry["retry_at"]
+    restaurants, _ = _refresh(web)
+    entry = _entry(web, "oasis")
+    assert (entry["ok"], entry["failures"], entry["retry_at"]) == (True, 0, 0)
+    assert not restaurants[name].get("stale")
+    assert restaurants[name]["menu"][0]["food"] == "Lohikeitto"
+
+
+def test_first_failure_of_the_day_is_shown_as_failed(web, upstream, clock):
+    upstream.failing = {"oasis"}
+    restaurants, _ = _refresh(web)
+    name = scrapers.RESTAURANTS["oasis"]["name"]
+    assert restaurants[name]["failed"] and not restaurants[name].get("stale")
+    assert _entry(web, "oasis")["failures"] == 1
+
+
+def test_concurrent_misses_share_one_fetch(web, upstream):
+    upstream.gate.clear()
+    entries = []
+    threads = [threading.Thread(target=lambda: entries.append(web.get_cached_entry())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    upstream.gate.set()
+    for t in threads:
+        t.join(5)
+    assert len(upstream.calls) == 1
+    assert len(entries) == 8 and len({entry["generation"] for entry in entries}) == 1
+
+
+def test_stale_entry_is_served_while_refreshing_in_background(web, upstream, clock):
+    first = web.get_cached_entry()
+    upstream.food = "Lohikeitto"
+    upstream.gate.clear()
+    clock[0] += web.CACHE_TTL_SECONDS + 1
+
+    # Vanhentunut merkinta palautetaan heti, paivitys odottaa taustalla
+    assert web.get_cached_entry()["generation"] == first["generation"]
+    assert web.lookup_entry()[1] == "stale"
+    upstream.gate.set()
+    deadline = time.monotonic() + 5
+    while web._background_refresh:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    entry, state = web.lookup_entry()
+    assert state == "hit" and entry["generation"] != first["generation"]
+    assert len(upstream.calls) == 2
+
+
+# ============================================================
+# /refresh-tyot
+# ============================================================
+
+@pytest.fixture
+def jobs(web, monkeypatch):
+    """_refresh_entries-korvike, joka odottaa release-tapahtumaa ja epaonnistuu fail-listan mukaan."""
+    release = threading.Event()
+    runs = []
+    fail = []
+
+    def refresh_entries(force, locations):
+        runs.append(locations)
+        release.wait(5)
+        if fail:
+            raise RuntimeError("upstream rikki")
+
+    monkeypatch.setattr(web, "_refresh_entries", refresh_entries)
+    return release, runs, fail
+
+
+def _finish(web, job):
+    deadline = time.monotonic() + 5
+    while web.get_refresh_job(job["id"])["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return web.get_refresh_job(job["id"])
+
+
+def test_refresh_clicks_join_the_running_job(web, jobs):
+    release, runs, _ = jobs
+    job, created = web.enqueue_refresh()
+    again, joined = web.enqueue_refresh()
+    assert created and not joined and again["id"] == job["id"]
+    release.set()
+    assert _finish(web, job)["status"] == "done"
+    assert len(runs) == 1
+
+
+@pytest.mark.parametrize("fails, cooldown", [(False, "REFRESH_COOLDOWN_SECONDS"),
+                                             (True, "REFRESH_FAILURE_COOLDOWN_SECONDS")])
+def test_refresh_cooldown_after_finished_job(web, jobs, fails, cooldown):
+    release, runs, fail = jobs
+    if fails:
+        fail.append(True)
+    release.set()
+    job, _ = web.enqueue_refresh()
+    finished = _finish(web, job)
+    assert finished["status"] == ("failed" if fails else "done")
+
+    again, created = web.enqueue_refresh()
+    assert not created and again["id"] == job["id"]
+
+    real_time = time.time
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(time, "time", lambda: real_time() + getattr(web, cooldown))
+        new, created = web.enqueue_refresh()
+    assert created and new["id"] != job["id"]
+    _finish(web, new)
+    assert len(runs) == 2
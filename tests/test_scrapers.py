@@ -0,0 +1,42 @@
+import time
+from datetime import date
+
+import pytest
+
+import models
+import scrapers
+
+TODAY = date(2026, 10, 15)  # torstai
+
+
+@pytest.fixture
+def week(monkeypatch):
+    """Oasiksen viikkoindeksi, jossa on tanaan paivan menu; sivun haku epaonnistuu aina."""
+    monkeypatch.setattr(scrapers, "_today_finland", lambda: TODAY)
+    monkeypatch.setattr(scrapers, "_week_index", {})
+    fetches = []
+
+    def failing_page(url, parse, args=(), key=""):
+        fetches.append(url)
+        return None
+
+    monkeypatch.setattr(scrapers, "_shared_page", failing_page)
+    year, week, _ = TODAY.isocalendar()
+    scrapers._store_week("oasis", year, week, {
+        "days": {TODAY.weekday(): models.menu_items([{"food": "Hernekeitto"}])},
+        "info": {},
+        "fetched": time.time() - 3600,
+    })
+    return fetches
+
+
+def test_week_menu_answers_from_index_without_fetching(week):
+    menu, _ = scrapers._week_menu("oasis", scrapers.RESTAURANTS["oasis"], TODAY)
+    assert [item["food"] for item in menu] == ["Hernekeitto"]
+    assert week == []
+
+
+def test_failed_refresh_is_reported_as_failure(week):
+    assert scrapers._week_menu("oasis", scrapers.RESTAURANTS["oasis"], TODAY, refresh=True) is None
+    assert len(week) == 1
+    assert scrapers.fetch_restaurant("oasis", TODAY, refresh=True).failed
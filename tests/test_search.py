@@ -0,0 +1,78 @@
+import pytest
+
+import search
+
+
+def _menu(*foods):
+    return [{"food": food} for food in foods]
+
+
+@pytest.fixture
+def index():
+    index = search.SearchIndex()
+    index.replace_day("2026-10-12", [
+        {"key": "oasis", "name": "Ravintola Oasis", "menu": _menu("Hernekeitto ja pannukakku", "Broileria kermakastikkeessa")},
+        {"key": "pannu", "name": "Pannu", "menu": _menu("Lohikeittoa ja ruisleipää", "Kasvispyörykät")},
+    ])
+    return index
+
+
+def _foods(results):
+    return {r["food"] for r in results}
+
+
+def test_normalize_strips_case_and_diacritics():
+    assert search.normalize("Kasvispyörykät ÅÄÖ") == "kasvispyorykat aao"
+    assert search.tokenize("Lohi-keitto, L/G") == ["lohi", "keitto", "l", "g"]
+
+
+def test_term_matches_prefix_and_compound_suffix(index):
+    assert _foods(index.search("keitto")) == {"Hernekeitto ja pannukakku", "Lohikeittoa ja ruisleipää"}
+
+
+def test_term_matches_with_diacritics_removed(index):
+    assert _foods(index.search("pyorykat")) == {"Kasvispyörykät"}
+    assert _foods(index.search("RUISLEIPÄ")) == {"Lohikeittoa ja ruisleipää"}
+
+
+def test_term_must_be_inside_a_single_word(index):
+    assert _foods(index.search("he")) == {"Hernekeitto ja pannukakku"}
+    assert index.search("keittoja") == []
+    assert index.search("keittojapannu") == []
+
+
+def test_multiple_terms_intersect(index):
+    assert _foods(index.search("keitto pannukakku")) == {"Hernekeitto ja pannukakku"}
+    assert index.search("keitto broileri") == []
+
+
+def test_restaurant_name_is_searchable(index):
+    assert _foods(index.search("oasis keitto")) == {"Hernekeitto ja pannukakku"}
+    assert _foods(index.search("pannu")) == {
+        "Hernekeitto ja pannukakku", "Lohikeittoa ja ruisleipää", "Kasvispyörykät"}
+
+
+def test_replace_removes_old_rows(index):
+    index.replace("2026-10-12", "oasis", "Ravintola Oasis", _menu("Makaronilaatikko"))
+    assert _foods(index.search("keitto")) == {"Lohikeittoa ja ruisleipää"}
+    assert _foods(index.search("laatikko")) == {"Makaronilaatikko"}
+    # Poistetun rivin sana ei jaa loppuosaindeksiin
+    assert index.search("herne") == []
+
+
+def test_replace_day_drops_missing_restaurants(index):
+    index.replace_day("2026-10-12", [{"key": "oasis", "name": "Ravintola Oasis", "menu": _menu("Hernekeitto")}])
+    assert _foods(index.search("keitto")) == {"Hernekeitto"}
+    assert len(index) == 1
+
+
+def test_day_filter_and_newest_first(index):
+    index.replace_day("2026-10-13", [{"key": "oasis", "name": "Ravintola Oasis", "menu": _menu("Kalakeitto")}])
+    assert [r["food"] for r in index.search("kalakeitto")] == ["Kalakeitto"]
+    assert _foods(index.search("keitto", day="2026-10-12")) == {"Hernekeitto ja pannukakku", "Lohikeittoa ja ruisleipää"}
+    assert index.search("keitto", limit=1)[0]["date"] == "2026-10-13"
+    assert index.search("keitto", day="2026-10-14") == []
+
+
+def test_empty_query_returns_nothing(index):
+    assert index.search("  ,, ") == []